@@ -0,0 +1,52 @@
+"""Add natural-key unique constraints for segment and highlight upserts
+
+Saving a transcription or highlight set upserts rows on
+(transcription_id, segment_index) and (media_id, highlight_id) instead of
+deleting and re-inserting everything.
+
+Revision ID: 004
+Revises: 003_add_clip_timestamps
+Create Date: 2026-10-16
+"""
+from alembic import op
+
+
+# revision identifiers
+revision = '004_add_natural_key_constraints'
+down_revision = '003_add_clip_timestamps'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Drop duplicate rows left by earlier saves, then add the constraints."""
+    op.execute("""
+        DELETE FROM transcript_segments a
+        USING transcript_segments b
+        WHERE a.transcription_id = b.transcription_id
+          AND a.segment_index = b.segment_index
+          AND a.ctid < b.ctid
+    """)
+    op.execute("""
+        DELETE FROM highlights a
+        USING highlights b
+        WHERE a.media_id = b.media_id
+          AND a.highlight_id = b.highlight_id
+          AND a.ctid < b.ctid
+    """)
+    op.create_unique_constraint(
+        'uq_transcript_segments_transcription_index',
+        'transcript_segments',
+        ['transcription_id', 'segment_index'],
+    )
+    op.create_unique_constraint(
+        'uq_highlights_media_highlight',
+        'highlights',
+        ['media_id', 'highlight_id'],
+    )
+
+
+def downgrade() -> None:
+    """Remove the natural-key constraints."""
+    op.drop_constraint('uq_highlights_media_highlight', 'highlights', type_='unique')
+    op.drop_constraint('uq_transcript_segments_transcription_index', 'transcript_segments', type_='unique')
@@ -3,9 +3,10 @@ API routes for SpaceClip
 
 DIAGNOSTIC NOTES (Observed Issues - NOT FIXED):
 - Multiple concurrent highlight analyses for the same media_id observed in logs
+  (now coalesced inside HighlightDetector.analyze)
 - Sequential clip generation causing perceived slowness (2 platforms × 30s = ~60s minimum)
 - Heavy FFmpeg cost per platform (CPU-intensive operations)
-- No request deduplication or locking mechanism currently implemented
+- No request deduplication or locking mechanism for clip generation
 
 State clearly: "These are known and verified. No optimization is implemented in this task."
 """
@@ -258,7 +259,8 @@ async def transcribe_media(
             media_id=media_id,
             file_path=Path(project.media.file_path),
             language=language,
-            num_speakers=num_speakers
+            num_speakers=num_speakers,
+            duration=project.media.duration or None
         )
         
         project.transcription = result
@@ -920,7 +922,8 @@ async def process_full(
                 try:
                     transcription = await transcription_service.transcribe_with_speakers(
                         media_id=media_id,
-                        file_path=Path(project.media.file_path)
+                        file_path=Path(project.media.file_path),
+                        duration=project.media.duration or None
                     )
                 finally:
                     # Clear callback after transcription
@@ -14,6 +14,16 @@ class Settings(BaseSettings):
     
     # Database
     database_url: str = Field(..., description="PostgreSQL database URL (required)")
+    # Per process: each uvicorn worker opens up to db_pool_size + db_max_overflow
+    # connections, and workers x that total must stay under Postgres max_connections (default 100)
+    db_pool_size: int = Field(
+        default=10,
+        description="Persistent connections kept in the database pool (per worker process)"
+    )
+    db_max_overflow: int = Field(
+        default=5,
+        description="Extra connections the pool may open beyond db_pool_size under load (per worker process)"
+    )
     
     # Redis (optional, for rate limiting/caching)
     redis_url: Optional[str] = Field(
@@ -39,6 +49,31 @@ class Settings(BaseSettings):
         default="base",
         description="Whisper model name"
     )
+    whisper_batch_size: int = Field(
+        default=8,
+        ge=1,
+        description="30s windows decoded per forward pass (faster-whisper batched pipeline; 1 = sequential)"
+    )
+    
+    # HuggingFace model cache (faster-whisper + pyannote); None uses HF_HOME / ~/.cache/huggingface
+    hf_cache_dir: Optional[Path] = Field(
+        default=None,
+        description="Directory for cached HuggingFace model weights, shared across workers"
+    )
+    diarization_workers: int = Field(
+        default=1,
+        description="Concurrent pyannote inferences per process (1 matches a single GPU)"
+    )
+    diarization_segmentation_step: float = Field(
+        default=0.1,
+        gt=0,
+        le=1,
+        description="Segmentation window step as a fraction of the 10s window (pyannote default 0.1; 0.2 halves segmentation passes)"
+    )
+    diarization_int8: bool = Field(
+        default=False,
+        description="Dynamically quantize pyannote LSTM/Linear layers to int8 when running without a GPU"
+    )
     
     # Storage
     upload_dir: Path = Field(
@@ -49,6 +84,15 @@ class Settings(BaseSettings):
         default=Path("./outputs"),
         description="Directory for generated output files"
     )
+    cache_dir: Path = Field(
+        default=Path("./cache"),
+        description="Directory for derived-data caches such as diarization results (not served publicly)"
+    )
+    ffmpeg_max_concurrency: int = Field(
+        default=4,
+        ge=1,
+        description="Max run-to-completion ffmpeg jobs (clip/audiogram renders, audio cuts) at once per process"
+    )
     
     # Server
     host: str = Field(
@@ -0,0 +1,13 @@
+"""
+Process-wide cap on concurrent ffmpeg jobs.
+
+Renders and audio cuts are CPU-bound; past a few at once they only slow
+each other down, so every run-to-completion ffmpeg call holds a slot.
+Long-lived streaming decoders (transcription, VAD) are paced by their
+consumers and don't take one.
+"""
+import asyncio
+
+from config import settings
+
+ffmpeg_slots = asyncio.Semaphore(settings.ffmpeg_max_concurrency)
@@ -1,6 +1,7 @@
 """
 SpaceClip Backend - FastAPI Application
 """
+import asyncio
 import json
 import logging
 import uuid
@@ -21,6 +22,8 @@ from config import settings
 from api import router
 from api import auth_routes
 from models.database import get_db_session, async_engine
+from services.media_downloader import media_downloader
+from services.transcription import transcription_service
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from logging_context import request_id_var, user_id_var
@@ -342,6 +345,26 @@ async def lifespan(app: FastAPI):
         # Re-raise to prevent app from starting with broken DB
         raise
     
+    # Register yt-dlp extractors now rather than on the first download request
+    try:
+        await media_downloader.warm_up()
+        logger.info("   ✅ yt-dlp extractors loaded")
+    except Exception as e:
+        logger.warning(f"   ⚠️ yt-dlp warm-up failed: {e}")
+    
+    # Load Whisper in the background; a first-run model download can take
+    # minutes and shouldn't hold up startup or health checks
+    def _log_whisper_warm_up(task: asyncio.Task) -> None:
+        if task.cancelled():
+            return
+        if task.exception():
+            logger.warning(f"   ⚠️ Whisper warm-up failed: {task.exception()}")
+        else:
+            logger.info("   ✅ Whisper model loaded")
+    
+    whisper_warm_up = asyncio.create_task(transcription_service.warm_up())
+    whisper_warm_up.add_done_callback(_log_whisper_warm_up)
+    
     if settings.redis_url:
         logger.info(f"   Redis URL: {settings.redis_url.split('@')[1] if '@' in settings.redis_url else 'configured'}")
     else:
@@ -350,6 +373,9 @@ async def lifespan(app: FastAPI):
     yield
     
     logger.info("SpaceClip Backend shutting down...")
+    whisper_warm_up.cancel()
+    transcription_service.shutdown()
+    media_downloader.shutdown()
     # Close database engine
     await async_engine.dispose()
     logger.info("   Database connections closed")
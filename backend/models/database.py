@@ -19,10 +19,18 @@ async_engine = create_async_engine(
     settings.database_url,
     echo=False,  # Set to True for SQL query logging in development
     future=True,
-    pool_size=5,  # Number of connections to maintain in the pool
-    max_overflow=10,  # Maximum number of connections to create beyond pool_size
+    # Sized for concurrency: a project save checks out up to 4 connections at once
+    # (media row + transcription/highlights/clips in parallel)
+    pool_size=settings.db_pool_size,  # Number of connections to maintain in the pool
+    max_overflow=settings.db_max_overflow,  # Maximum number of connections to create beyond pool_size
     pool_timeout=30,  # Seconds to wait before giving up on getting a connection
     pool_recycle=1800,  # Seconds before recreating a connection (30 minutes)
+    pool_pre_ping=True,  # Ping on checkout so connections killed by a failover/NAT timeout are replaced
+    connect_args={
+        # Lets the Postgres server reap its side of connections whose client vanished;
+        # does not protect the client pool (that's what pool_pre_ping is for)
+        "server_settings": {"tcp_keepalives_idle": "30"},
+    },
 )
 
 # Create async session maker
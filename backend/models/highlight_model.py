@@ -3,7 +3,7 @@ SQLAlchemy ORM model for Highlights table
 """
 from datetime import datetime
 from typing import TYPE_CHECKING
-from sqlalchemy import String, Float, Integer, ForeignKey, Text
+from sqlalchemy import String, Float, Integer, ForeignKey, Text, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID, ARRAY
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 import uuid
@@ -43,6 +43,11 @@ class HighlightModel(Base):
         "MediaModel",
         back_populates="highlights"
     )
+    
+    # Natural key used by the save-path upsert
+    __table_args__ = (
+        UniqueConstraint("media_id", "highlight_id", name="uq_highlights_media_highlight"),
+    )
 
 
 
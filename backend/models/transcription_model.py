@@ -3,7 +3,7 @@ SQLAlchemy ORM models for Transcription and TranscriptSegment tables
 """
 from datetime import datetime
 from typing import TYPE_CHECKING
-from sqlalchemy import String, Float, Integer, ForeignKey, Text
+from sqlalchemy import String, Float, Integer, ForeignKey, Text, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 import uuid
@@ -72,6 +72,11 @@ class TranscriptSegmentModel(Base):
         "TranscriptionModel",
         back_populates="segments"
     )
+    
+    # Natural key used by the save-path upsert
+    __table_args__ = (
+        UniqueConstraint("transcription_id", "segment_index", name="uq_transcript_segments_transcription_index"),
+    )
 
 
 
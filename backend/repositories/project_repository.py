@@ -1,10 +1,14 @@
 """
 Project repository for database operations
 """
+import uuid
 from uuid import UUID
 from datetime import datetime
 from typing import Optional
-from sqlalchemy import select, update, delete
+from asyncpg.exceptions import UniqueViolationError
+from sqlalchemy import select, update, delete, func, text, literal_column, or_, case, true, exists
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
@@ -15,6 +19,40 @@ from models.transcription_model import TranscriptionModel, TranscriptSegmentMode
 from models.highlight_model import HighlightModel
 from models.clip_model import ClipModel
 
+# Batches at least this large are written with COPY instead of INSERTs
+COPY_THRESHOLD = 100
+# Rows per multi-VALUES upsert (keeps bind parameters well under asyncpg's 32767 limit)
+UPSERT_BATCH_SIZE = 1000
+
+# Parent row and its segments in one round-trip: the CTE inserts the
+# transcription, the outer INSERT unnests parallel segment arrays against it
+_INSERT_TRANSCRIPTION_WITH_SEGMENTS = text("""
+    WITH t AS (
+        INSERT INTO transcriptions (id, media_id, language, full_text, created_at)
+        VALUES (:id, :media_id, :language, :full_text, :created_at)
+        RETURNING id
+    )
+    INSERT INTO transcript_segments
+        (id, transcription_id, segment_index, start_time, end_time, text, speaker, confidence)
+    SELECT v.id, t.id, v.segment_index, v.start_time, v.end_time, v.text, v.speaker, v.confidence
+    FROM t, unnest(
+        CAST(:seg_ids AS uuid[]),
+        CAST(:segment_indexes AS integer[]),
+        CAST(:start_times AS double precision[]),
+        CAST(:end_times AS double precision[]),
+        CAST(:texts AS text[]),
+        CAST(:speakers AS varchar[]),
+        CAST(:confidences AS double precision[])
+    ) AS v(id, segment_index, start_time, end_time, text, speaker, confidence)
+""")
+
+
+async def _copy_records(db: AsyncSession, table: str, columns: list[str], records: list[tuple]) -> None:
+    """Bulk-load rows through asyncpg's COPY on the session's own connection/transaction"""
+    connection = await db.connection()
+    raw = await connection.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(table, records=records, columns=columns)
+
 
 class ProjectRepository:
     """Repository for Project database operations"""
@@ -128,19 +166,28 @@ class MediaRepository:
         result = await db.execute(stmt)
         return result.scalar_one_or_none()
     
-    async def get_by_id_with_relations(self, db: AsyncSession, media_id: UUID) -> MediaModel | None:
-        """Get media by ID with all related data loaded"""
+    async def get_with_owner(
+        self,
+        db: AsyncSession,
+        media_id: UUID,
+        with_relations: bool = False
+    ) -> tuple[MediaModel, UUID | None] | None:
+        """Get media by ID together with its owning user ID (joined, no extra query)"""
         stmt = (
-            select(MediaModel)
+            select(MediaModel, ProjectModel.user_id)
+            .outerjoin(ProjectModel, MediaModel.project_id == ProjectModel.id)
             .where(MediaModel.id == media_id)
-            .options(
-                selectinload(MediaModel.transcription).selectinload(TranscriptionModel.segments),
+        )
+        if with_relations:
+            # Segments are not hydrated as ORM objects; use get_segments_raw for them
+            stmt = stmt.options(
+                selectinload(MediaModel.transcription),
                 selectinload(MediaModel.highlights),
                 selectinload(MediaModel.clips),
             )
-        )
         result = await db.execute(stmt)
-        return result.scalar_one_or_none()
+        row = result.one_or_none()
+        return (row[0], row[1]) if row else None
     
     async def get_by_project_id(self, db: AsyncSession, project_id: UUID) -> list[MediaModel]:
         """Get all media for a project"""
@@ -148,6 +195,37 @@ class MediaRepository:
         result = await db.execute(stmt)
         return list(result.scalars().all())
     
+    async def list_with_counts(
+        self,
+        db: AsyncSession,
+        user_id: UUID,
+        include_archived: bool = False
+    ) -> list[tuple[MediaModel, int, int]]:
+        """List a user's media with highlight and clip counts in one query"""
+        # Correlated subqueries rather than joins so the two counts don't multiply
+        highlight_count = (
+            select(func.count(HighlightModel.id))
+            .where(HighlightModel.media_id == MediaModel.id)
+            .correlate(MediaModel)
+            .scalar_subquery()
+        )
+        clip_count = (
+            select(func.count(ClipModel.id))
+            .where(ClipModel.media_id == MediaModel.id)
+            .correlate(MediaModel)
+            .scalar_subquery()
+        )
+        stmt = (
+            select(MediaModel, highlight_count.label("hcount"), clip_count.label("ccount"))
+            .join(ProjectModel, MediaModel.project_id == ProjectModel.id)
+            .where(ProjectModel.user_id == user_id)
+            .order_by(MediaModel.updated_at.desc().nulls_last())
+        )
+        if not include_archived:
+            stmt = stmt.where(MediaModel.status != "archived")
+        result = await db.execute(stmt)
+        return [(media, hcount, ccount) for media, hcount, ccount in result.all()]
+    
     async def list_all(self, db: AsyncSession, limit: int = 100) -> list[MediaModel]:
         """List all media (for listing projects)"""
         stmt = select(MediaModel).order_by(MediaModel.created_at.desc()).limit(limit)
@@ -191,6 +269,48 @@ class MediaRepository:
         await db.commit()
         return result.rowcount > 0
     
+    def _owned_by(self, user_id: UUID | None):
+        """WHERE clause: media is unowned or belongs to one of user_id's projects"""
+        if user_id is None:
+            return true()
+        return or_(
+            MediaModel.project_id.is_(None),
+            MediaModel.project_id.in_(select(ProjectModel.id).where(ProjectModel.user_id == user_id)),
+        )
+    
+    async def update_status_if_owner(
+        self,
+        db: AsyncSession,
+        media_id: UUID,
+        status: str,
+        user_id: UUID | None = None
+    ) -> bool:
+        """Set media status in one statement, enforcing ownership server-side"""
+        stmt = (
+            update(MediaModel)
+            .where(MediaModel.id == media_id)
+            .where(self._owned_by(user_id))
+            .values(status=status, updated_at=datetime.utcnow())
+        )
+        result = await db.execute(stmt)
+        await db.commit()
+        return result.rowcount > 0
+    
+    async def restore_status_if_owner(self, db: AsyncSession, media_id: UUID, user_id: UUID | None = None) -> bool:
+        """Unarchive media: complete if fully processed, otherwise pending (one statement)"""
+        stmt = (
+            update(MediaModel)
+            .where(MediaModel.id == media_id)
+            .where(self._owned_by(user_id))
+            .values(
+                status=case((MediaModel.progress >= 1.0, "complete"), else_="pending"),
+                updated_at=datetime.utcnow(),
+            )
+        )
+        result = await db.execute(stmt)
+        await db.commit()
+        return result.rowcount > 0
+    
     async def delete(self, db: AsyncSession, media_id: UUID) -> bool:
         """Delete a media entry by ID (cascades to related data)"""
         stmt = delete(MediaModel).where(MediaModel.id == media_id)
@@ -218,6 +338,26 @@ class TranscriptionRepository:
         result = await db.execute(stmt)
         return result.scalar_one_or_none()
     
+    async def get_segments_raw(self, db: AsyncSession, transcription_id: UUID) -> list[tuple]:
+        """Get a transcription's segments as plain column tuples, skipping ORM hydration
+        
+        Each row is (segment_index, start_time, end_time, text, speaker, confidence).
+        """
+        stmt = (
+            select(
+                TranscriptSegmentModel.segment_index,
+                TranscriptSegmentModel.start_time,
+                TranscriptSegmentModel.end_time,
+                TranscriptSegmentModel.text,
+                TranscriptSegmentModel.speaker,
+                TranscriptSegmentModel.confidence,
+            )
+            .where(TranscriptSegmentModel.transcription_id == transcription_id)
+            .order_by(TranscriptSegmentModel.segment_index)
+        )
+        result = await db.execute(stmt)
+        return result.tuples().all()
+    
     async def create(self, db: AsyncSession, transcription: TranscriptionModel) -> TranscriptionModel:
         """Create a new transcription"""
         db.add(transcription)
@@ -232,17 +372,126 @@ class TranscriptionRepository:
         segments: list[TranscriptSegmentModel]
     ) -> TranscriptionModel:
         """Create transcription with all segments"""
-        db.add(transcription)
-        await db.flush()  # Get transcription ID
-        
-        for segment in segments:
-            segment.transcription_id = transcription.id
-            db.add(segment)
+        if len(segments) < COPY_THRESHOLD:
+            transcription.id = transcription.id or uuid.uuid4()
+            transcription.created_at = transcription.created_at or datetime.utcnow()
+            await db.execute(_INSERT_TRANSCRIPTION_WITH_SEGMENTS, {
+                "id": transcription.id,
+                "media_id": transcription.media_id,
+                "language": transcription.language or "en",
+                "full_text": transcription.full_text or "",
+                "created_at": transcription.created_at,
+                "seg_ids": [s.id or uuid.uuid4() for s in segments],
+                "segment_indexes": [s.segment_index for s in segments],
+                "start_times": [s.start_time for s in segments],
+                "end_times": [s.end_time for s in segments],
+                "texts": [s.text for s in segments],
+                "speakers": [s.speaker for s in segments],
+                "confidences": [1.0 if s.confidence is None else s.confidence for s in segments],
+            })
+            await db.commit()
+            return transcription
         
+        # Large batches: insert the parent for its ID, then COPY the segments
+        db.add(transcription)
+        await db.flush()
+        await _copy_records(
+            db,
+            TranscriptSegmentModel.__tablename__,
+            ["id", "transcription_id", "segment_index", "start_time", "end_time", "text", "speaker", "confidence"],
+            [
+                (
+                    s.id or uuid.uuid4(), transcription.id, s.segment_index, s.start_time,
+                    s.end_time, s.text, s.speaker, 1.0 if s.confidence is None else s.confidence,
+                )
+                for s in segments
+            ],
+        )
         await db.commit()
         await db.refresh(transcription)
         return transcription
     
+    async def upsert_with_segments(
+        self,
+        db: AsyncSession,
+        transcription: TranscriptionModel,
+        segments: list[TranscriptSegmentModel]
+    ) -> UUID:
+        """Insert or update a media item's transcription and its segments in place"""
+        existing = await db.scalar(
+            select(exists().where(TranscriptionModel.media_id == transcription.media_id))
+        )
+        if not existing:
+            # Fresh insert: nothing to reconcile, take the single-statement/COPY path
+            try:
+                created = await self.create_with_segments(
+                    db, transcription, list({s.segment_index: s for s in segments}.values())
+                )
+                return created.id
+            except IntegrityError:
+                # A concurrent save created the transcription first; reconcile against it
+                await db.rollback()
+        
+        stmt = (
+            pg_insert(TranscriptionModel)
+            .values(
+                id=uuid.uuid4(),
+                media_id=transcription.media_id,
+                language=transcription.language or "en",
+                full_text=transcription.full_text or "",
+                created_at=datetime.utcnow(),
+            )
+            .on_conflict_do_update(
+                index_elements=["media_id"],
+                set_={"language": transcription.language or "en", "full_text": transcription.full_text or ""},
+            )
+            # xmax is 0 only for a freshly inserted row
+            .returning(TranscriptionModel.id, literal_column("xmax = 0"))
+        )
+        transcription_id, inserted = (await db.execute(stmt)).one()
+        
+        # Last occurrence wins; ON CONFLICT can't touch the same row twice in one statement
+        by_index = {s.segment_index: s for s in segments}
+        rows = [
+            {
+                "id": uuid.uuid4(),
+                "transcription_id": transcription_id,
+                "segment_index": s.segment_index,
+                "start_time": s.start_time,
+                "end_time": s.end_time,
+                "text": s.text,
+                "speaker": s.speaker,
+                "confidence": 1.0 if s.confidence is None else s.confidence,
+            }
+            for s in by_index.values()
+        ]
+        
+        for i in range(0, len(rows), UPSERT_BATCH_SIZE):
+            insert_stmt = pg_insert(TranscriptSegmentModel).values(rows[i:i + UPSERT_BATCH_SIZE])
+            changed = {
+                name: getattr(insert_stmt.excluded, name)
+                for name in ("start_time", "end_time", "text", "speaker", "confidence")
+            }
+            await db.execute(insert_stmt.on_conflict_do_update(
+                index_elements=["transcription_id", "segment_index"],
+                set_=changed,
+                # Skip the write entirely for segments that didn't change
+                where=or_(*(
+                    getattr(TranscriptSegmentModel, name).is_distinct_from(value)
+                    for name, value in changed.items()
+                )),
+            ))
+        if not inserted:
+            # Drop only the segments that are no longer part of the transcript
+            await db.execute(
+                delete(TranscriptSegmentModel)
+                .where(TranscriptSegmentModel.transcription_id == transcription_id)
+                .where(TranscriptSegmentModel.segment_index.notin_(list(by_index)))
+            )
+        
+        await db.commit()
+        return transcription_id
+    
     async def delete_by_media_id(self, db: AsyncSession, media_id: UUID) -> bool:
         """Delete transcription for a media item"""
         stmt = delete(TranscriptionModel).where(TranscriptionModel.media_id == media_id)
@@ -273,6 +522,30 @@ class HighlightRepository:
     
     async def create_many(self, db: AsyncSession, highlights: list[HighlightModel]) -> list[HighlightModel]:
         """Create multiple highlights"""
+        if len(highlights) >= COPY_THRESHOLD:
+            now = datetime.utcnow()
+            for h in highlights:
+                h.id = h.id or uuid.uuid4()
+                h.created_at = h.created_at or now
+            await _copy_records(
+                db,
+                HighlightModel.__tablename__,
+                [
+                    "id", "media_id", "highlight_id", "start_time", "end_time", "title",
+                    "description", "score", "tags", "transcript_segment_ids", "created_at",
+                ],
+                [
+                    (
+                        h.id, h.media_id, h.highlight_id, h.start_time, h.end_time, h.title,
+                        h.description or "", h.score or 0.0, h.tags or [], h.transcript_segment_ids or [],
+                        h.created_at,
+                    )
+                    for h in highlights
+                ],
+            )
+            await db.commit()
+            return highlights
+        
         for highlight in highlights:
             db.add(highlight)
         await db.commit()
@@ -280,6 +553,63 @@ class HighlightRepository:
             await db.refresh(highlight)
         return highlights
     
+    async def upsert_many(self, db: AsyncSession, media_id: UUID, highlights: list[HighlightModel]) -> None:
+        """Replace a media item's highlights by upserting on highlight_id and pruning the rest"""
+        by_id = {h.highlight_id: h for h in highlights}
+        if len(by_id) >= COPY_THRESHOLD and not await db.scalar(
+            select(exists().where(HighlightModel.media_id == media_id))
+        ):
+            # Fresh insert of a large batch: nothing to reconcile, COPY it in
+            for h in by_id.values():
+                h.media_id = media_id
+            try:
+                await self.create_many(db, list(by_id.values()))
+                return
+            except UniqueViolationError:
+                # A concurrent save inserted highlights first; upsert against them
+                await db.rollback()
+        
+        if by_id:
+            now = datetime.utcnow()
+            stmt = pg_insert(HighlightModel).values([
+                {
+                    "id": uuid.uuid4(),
+                    "media_id": media_id,
+                    "highlight_id": h.highlight_id,
+                    "start_time": h.start_time,
+                    "end_time": h.end_time,
+                    "title": h.title,
+                    "description": h.description or "",
+                    "score": h.score or 0.0,
+                    "tags": h.tags or [],
+                    "transcript_segment_ids": h.transcript_segment_ids or [],
+                    "created_at": now,
+                }
+                for h in by_id.values()
+            ])
+            changed = {
+                name: getattr(stmt.excluded, name)
+                for name in (
+                    "start_time", "end_time", "title", "description",
+                    "score", "tags", "transcript_segment_ids",
+                )
+            }
+            await db.execute(stmt.on_conflict_do_update(
+                index_elements=["media_id", "highlight_id"],
+                set_=changed,
+                where=or_(*(
+                    getattr(HighlightModel, name).is_distinct_from(value)
+                    for name, value in changed.items()
+                )),
+            ))
+        
+        await db.execute(
+            delete(HighlightModel)
+            .where(HighlightModel.media_id == media_id)
+            .where(HighlightModel.highlight_id.notin_(list(by_id)))
+        )
+        await db.commit()
+    
     async def delete_by_media_id(self, db: AsyncSession, media_id: UUID) -> int:
         """Delete all highlights for a media item"""
         stmt = delete(HighlightModel).where(HighlightModel.media_id == media_id)
@@ -308,6 +638,15 @@ class ClipRepository:
         await db.refresh(clip)
         return clip
     
+    async def insert_many_ignore_existing(self, db: AsyncSession, rows: list[dict]) -> int:
+        """Insert clip rows in one statement, skipping IDs that already exist"""
+        if not rows:
+            return 0
+        stmt = pg_insert(ClipModel).values(rows).on_conflict_do_nothing(index_elements=["id"])
+        result = await db.execute(stmt)
+        await db.commit()
+        return result.rowcount
+    
     async def delete(self, db: AsyncSession, clip_id: UUID) -> bool:
         """Delete a clip by ID"""
         stmt = delete(ClipModel).where(ClipModel.id == clip_id)
@@ -3,13 +3,14 @@ Professional audiogram generation with customizable branding
 """
 import asyncio
 import logging
-import subprocess
+import os
 import uuid
 from pathlib import Path
 from typing import Optional, List
 from dataclasses import dataclass
 
 from config import settings
+from ffmpeg_limits import ffmpeg_slots
 from models import MediaInfo, TranscriptSegment, PlatformSpec
 
 logger = logging.getLogger(__name__)
@@ -160,8 +161,11 @@ class AudiogramGenerator:
         
         filter_complex = ";".join(filter_parts)
         
+        # Encode to a partial file and publish it with an atomic rename when complete
+        partial_path = self.output_dir / f"{clip_id}.partial.mp4"
+        
         # Create base audiogram without captions
-        temp_output = self.temp_dir / f"{clip_id}_temp.mp4" if captions else output_path
+        temp_output = self.temp_dir / f"{clip_id}_temp.mp4" if captions else partial_path
         
         cmd = [
             'ffmpeg', '-y',
@@ -178,17 +182,23 @@ class AudiogramGenerator:
             str(temp_output)
         ]
         
-        await self._run_ffmpeg(cmd)
-        
-        # Add captions if provided
-        if captions and len(captions) > 0:
-            await self._add_captions(
-                temp_output, output_path, captions, start, spec, cfg, is_portrait
-            )
+        try:
+            await self._run_ffmpeg(cmd)
+            
+            # Add captions if provided
+            if captions and len(captions) > 0:
+                await self._add_captions(
+                    temp_output, partial_path, captions, start, spec, cfg, is_portrait
+                )
+            
+            os.replace(partial_path, output_path)
+        except BaseException:
+            # Failed or cancelled encode: don't leave the partial file behind
+            partial_path.unlink(missing_ok=True)
+            raise
+        finally:
             # Clean up temp file
-            if temp_output.exists():
-                temp_output.unlink()
-        
+            temp_output.unlink(missing_ok=True)
         return output_path
     
     async def _add_captions(
@@ -274,20 +284,24 @@ class AudiogramGenerator:
     
     async def _run_ffmpeg(self, cmd: List[str]) -> None:
         """Run FFmpeg command"""
-        def _run():
-            logger.debug(f"Running FFmpeg: {' '.join(cmd)}")
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True
+        logger.debug(f"Running FFmpeg: {' '.join(cmd)}")
+        async with ffmpeg_slots:
+            # Await the child process directly instead of parking a pool thread on it
+            proc = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE,
             )
-            if result.returncode != 0:
-                logger.error(f"FFmpeg error: {result.stderr}")
-                raise RuntimeError(f"FFmpeg failed: {result.stderr[:500]}")
-            return result
-        
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(None, _run)
+            try:
+                _, stderr_bytes = await proc.communicate()
+            except asyncio.CancelledError:
+                proc.kill()
+                await proc.wait()
+                raise
+        if proc.returncode != 0:
+            stderr = stderr_bytes.decode(errors="replace")
+            logger.error(f"FFmpeg error: {stderr}")
+            raise RuntimeError(f"FFmpeg failed: {stderr[:500]}")
 
 
 # Singleton
@@ -446,11 +446,16 @@ class AuthService:
     
     async def delete_project(self, db: AsyncSession, user_id: str, project_id: str) -> bool:
         """Delete a project"""
+        # Collect the project's media first - deleting the project nulls their project_id
+        from repositories.project_repository import media_repository
+        media_list = await media_repository.get_by_project_id(db, UUID(project_id))
+        
         result = await self.project_repo.delete_by_user(db, UUID(user_id), UUID(project_id))
         if result:
-            # Also delete the project files from storage
+            # Also delete each media item, using the file paths recorded in the database
             from services.project_storage import project_storage
-            project_storage.delete_project(project_id)
+            for media in media_list:
+                await project_storage.delete_project_async(db, media.id)
         return result
     
     async def archive_project(self, db: AsyncSession, user_id: str, project_id: str) -> bool:
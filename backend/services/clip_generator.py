@@ -5,13 +5,14 @@ import asyncio
 import hashlib
 import json
 import logging
-import subprocess
+import os
 import uuid
 from pathlib import Path
 from typing import Optional
 import math
 
 from config import settings
+from ffmpeg_limits import ffmpeg_slots
 from models import (
     MediaInfo, 
     MediaType,
@@ -198,6 +199,7 @@ class ClipGenerator:
     ) -> Path:
         """Create video clip with optional captions"""
         output_path = self.output_dir / f"{clip_id}.mp4"
+        partial_path = self.output_dir / f"{clip_id}.partial.mp4"
         duration = end - start
         
         # Build filter chain
@@ -242,10 +244,17 @@ class ClipGenerator:
             '-c:v', 'libx264', '-preset', 'medium', '-crf', '23',
             '-c:a', 'aac', '-b:a', '128k',
             '-movflags', '+faststart',
-            str(output_path)
+            str(partial_path)
         ]
         
-        await self._run_ffmpeg(cmd)
+        try:
+            await self._run_ffmpeg(cmd)
+            # Publish only a complete file - a crash mid-encode must not leave a truncated clip
+            os.replace(partial_path, output_path)
+        except BaseException:
+            # Failed or cancelled encode: don't leave the partial file behind
+            partial_path.unlink(missing_ok=True)
+            raise
         return output_path
     
     async def _create_audiogram(
@@ -501,20 +510,24 @@ class ClipGenerator:
     
     async def _run_ffmpeg(self, cmd: list[str]) -> None:
         """Run FFmpeg command"""
-        def _run():
-            logger.debug(f"Running FFmpeg: {' '.join(cmd)}")
-            result = subprocess.run(
-                cmd, 
-                capture_output=True, 
-                text=True
+        logger.debug(f"Running FFmpeg: {' '.join(cmd)}")
+        async with ffmpeg_slots:
+            # Await the child process directly instead of parking a pool thread on it
+            proc = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE,
             )
-            if result.returncode != 0:
-                logger.error(f"FFmpeg error: {result.stderr}")
-                raise RuntimeError(f"FFmpeg failed: {result.stderr[:500]}")
-            return result
-        
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(None, _run)
+            try:
+                _, stderr_bytes = await proc.communicate()
+            except asyncio.CancelledError:
+                proc.kill()
+                await proc.wait()
+                raise
+        if proc.returncode != 0:
+            stderr = stderr_bytes.decode(errors="replace")
+            logger.error(f"FFmpeg error: {stderr}")
+            raise RuntimeError(f"FFmpeg failed: {stderr[:500]}")
     
     async def create_batch_clips(
         self,
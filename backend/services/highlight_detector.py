@@ -3,10 +3,12 @@ AI-powered highlight detection using Ollama (local LLM)
 Analyzes content in chunks to ensure full coverage
 """
 import asyncio
+import bisect
 import json
 import logging
 import uuid
 from typing import Optional
+import numpy as np
 import ollama
 
 from config import settings
@@ -19,12 +21,32 @@ CHUNK_DURATION = 600  # 10 minutes per chunk
 CHUNK_OVERLAP = 30    # 30 second overlap between chunks
 
 
+class _SegmentIndex:
+    """Start-sorted NumPy view of transcript segments for fast time-range lookups"""
+    
+    def __init__(self, segments: list):
+        starts = np.fromiter((s.start for s in segments), dtype=float, count=len(segments))
+        order = np.argsort(starts, kind="stable")
+        self.segments = [segments[i] for i in order]
+        self.starts = starts[order]
+        self.ends = np.fromiter((s.end for s in self.segments), dtype=float, count=len(segments))
+    
+    def within(self, start: float, end: float) -> list:
+        """Segments lying entirely inside [start, end], in start order"""
+        lo = int(np.searchsorted(self.starts, start, side="left"))
+        hi = int(np.searchsorted(self.starts, end, side="right"))
+        inside = np.flatnonzero(self.ends[lo:hi] <= end) + lo
+        return [self.segments[i] for i in inside]
+
+
 class HighlightDetector:
     """Detects highlights and suggests clips using local LLM"""
     
     def __init__(self):
         self.model = settings.ollama_model
         self.host = settings.ollama_host
+        # In-flight analyses keyed by (media_id, options) so duplicate requests share one run
+        self._inflight: dict[tuple, asyncio.Task] = {}
     
     async def analyze(
         self, 
@@ -38,11 +60,9 @@ class HighlightDetector:
         """
         Analyze transcription and detect highlights across the FULL content.
         
-        Task 2.5.5: Improved highlight discovery quality
-        - Minimum highlight density heuristic (5-10 per hour)
-        - Diversity constraints to avoid clustering
-        - Combined signals: content, sentiment, speaker turns, emphasis
-        - Re-ranking and scoring
+        Concurrent calls for the same media and options (e.g. UI retries on
+        reconnect) are coalesced: later callers await the running analysis
+        instead of starting another one.
         
         Args:
             media_id: Media identifier
@@ -55,6 +75,45 @@ class HighlightDetector:
         Returns:
             HighlightAnalysis with detected highlights from entire content
         """
+        key = (media_id, max_highlights, min_clip_duration, max_clip_duration, time_range)
+        task = self._inflight.get(key)
+        if task is not None:
+            logger.info(f"Joining in-flight highlight analysis for {media_id}")
+            result = await asyncio.shield(task)
+            # Callers mutate the result (append mode), so joiners get their own copy
+            return result.model_copy(deep=True)
+        
+        task = asyncio.create_task(self._analyze(
+            media_id,
+            transcription,
+            max_highlights,
+            min_clip_duration,
+            max_clip_duration,
+            time_range,
+        ))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shield so a cancelled first caller doesn't cancel the run for joiners
+        return await asyncio.shield(task)
+    
+    async def _analyze(
+        self, 
+        media_id: str,
+        transcription: TranscriptionResult,
+        max_highlights: int,
+        min_clip_duration: float,
+        max_clip_duration: float,
+        time_range: Optional[tuple[float, float]],
+    ) -> HighlightAnalysis:
+        """
+        Run highlight detection across the FULL content.
+        
+        Task 2.5.5: Improved highlight discovery quality
+        - Minimum highlight density heuristic (5-10 per hour)
+        - Diversity constraints to avoid clustering
+        - Combined signals: content, sentiment, speaker turns, emphasis
+        - Re-ranking and scoring
+        """
         logger.info(f"Analyzing highlights for {media_id}")
         
         # Get total duration
@@ -71,6 +130,9 @@ class HighlightDetector:
         
         content_duration = end_time - start_time
         
+        # Built once per analysis; every range lookup below is a binary search
+        segment_index = _SegmentIndex(transcription.segments)
+        
         # Task 2.5.5: Minimum highlight density heuristic
         # Aim for 5-10 highlights per hour of content, but at least 3
         hours = content_duration / 3600
@@ -83,7 +145,7 @@ class HighlightDetector:
         )
         
         # Split into chunks for analysis
-        chunks = self._create_chunks(transcription, start_time, end_time)
+        chunks = self._create_chunks(segment_index, start_time, end_time)
         logger.info(f"Analyzing {len(chunks)} chunks covering {end_time - start_time:.0f}s")
         
         # Calculate highlights per chunk to ensure even distribution
@@ -137,7 +199,7 @@ class HighlightDetector:
                 f"generating {min_expected_highlights - len(final_highlights)} fallbacks"
             )
             fallbacks = self._generate_signal_fallbacks(
-                transcription,
+                segment_index,
                 signal_regions,
                 final_highlights,
                 min_expected_highlights - len(final_highlights),
@@ -152,8 +214,7 @@ class HighlightDetector:
         # Assign final transcript segment IDs
         for highlight in final_highlights:
             highlight.transcript_segment_ids = [
-                seg.id for seg in transcription.segments
-                if seg.start >= highlight.start and seg.end <= highlight.end
+                seg.id for seg in segment_index.within(highlight.start, highlight.end)
             ]
         
         logger.info(f"Found {len(final_highlights)} highlights across full {total_duration:.0f}s content")
@@ -317,7 +378,7 @@ class HighlightDetector:
     
     def _generate_signal_fallbacks(
         self,
-        transcription: TranscriptionResult,
+        segment_index: _SegmentIndex,
         signal_regions: list[dict],
         existing_highlights: list[Highlight],
         count: int,
@@ -350,17 +411,14 @@ class HighlightDetector:
             duration = region['end'] - region['start']
             if duration < min_duration:
                 # Extend the region
-                end = min(region['start'] + min_duration, transcription.segments[-1].end)
+                end = min(region['start'] + min_duration, segment_index.segments[-1].end)
             elif duration > max_duration:
                 end = region['start'] + max_duration
             else:
                 end = region['end']
             
             # Get text for title/description
-            region_segments = [
-                s for s in transcription.segments
-                if s.start >= region['start'] and s.end <= end
-            ]
+            region_segments = segment_index.within(region['start'], end)
             
             if not region_segments:
                 continue
@@ -385,7 +443,7 @@ class HighlightDetector:
     
     def _create_chunks(
         self,
-        transcription: TranscriptionResult,
+        segment_index: _SegmentIndex,
         start_time: float,
         end_time: float
     ) -> list[dict]:
@@ -397,10 +455,9 @@ class HighlightDetector:
             chunk_end = min(current_start + CHUNK_DURATION, end_time)
             
             # Get segments in this chunk
-            chunk_segments = [
-                seg for seg in transcription.segments
-                if seg.start >= current_start - CHUNK_OVERLAP and seg.end <= chunk_end + CHUNK_OVERLAP
-            ]
+            chunk_segments = segment_index.within(
+                current_start - CHUNK_OVERLAP, chunk_end + CHUNK_OVERLAP
+            )
             
             if chunk_segments:
                 chunks.append({
@@ -468,8 +525,7 @@ class HighlightDetector:
                 logger.error(f"Ollama error for chunk {chunk_index}: {e}")
                 return None
         
-        loop = asyncio.get_event_loop()
-        response = await loop.run_in_executor(None, _analyze)
+        response = await asyncio.to_thread(_analyze)
         
         if not response:
             # Fallback for this chunk
@@ -799,8 +855,29 @@ Look for the BEST moments throughout, prioritizing quality and shareability."""
         if num_clips == 0 and total_duration > 0:
             num_clips = 1
         
-        interval = total_duration / max(num_clips, 1)
-        
+        if num_clips == 0:
+            return HighlightAnalysis(media_id=media_id, highlights=[])
+
+        if num_clips == 1:
+            # Short media: one clip from the start, segments are sorted so slice instead of scanning
+            end = min(clip_duration, total_duration)
+            segments = transcription.segments
+            cut = bisect.bisect_left(segments, end, key=lambda s: s.start)
+            clip_text = " ".join(s.text for s in segments[:cut])
+            highlights.append(Highlight(
+                id=str(uuid.uuid4()),
+                start=0,
+                end=end,
+                title="Clip 1",
+                description=clip_text[:100] + "..." if len(clip_text) > 100 else clip_text,
+                score=1.0,
+                tags=["auto-generated"],
+                transcript_segment_ids=[s.id for s in segments[:cut]]
+            ))
+            return HighlightAnalysis(media_id=media_id, highlights=highlights)
+
+        interval = total_duration / num_clips
+
         for i in range(num_clips):
             start = i * interval
             end = min(start + clip_duration, total_duration)
@@ -856,8 +933,7 @@ Look for the BEST moments throughout, prioritizing quality and shareability."""
                 logger.error(f"Caption generation error: {e}")
                 return transcript_text[:280]
         
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, _generate)
+        return await asyncio.to_thread(_generate)
     
     def validate_and_fix_highlights(
         self,
@@ -876,57 +952,56 @@ Look for the BEST moments throughout, prioritizing quality and shareability."""
         Returns:
             List of valid highlights with corrected timestamps
         """
-        valid_highlights = []
+        if not highlights:
+            return []
         
-        for highlight in highlights:
-            start = highlight.start
-            end = highlight.end
-            
-            # Check for obviously invalid timestamps
-            if start < 0:
-                logger.warning(f"Highlight {highlight.id} has negative start time, clamping to 0")
-                start = 0
-            
-            if end > media_duration:
-                logger.warning(
-                    f"Highlight {highlight.id} end time ({end}s) exceeds duration ({media_duration}s), clamping"
-                )
-                end = media_duration
-            
-            if start >= end:
-                logger.warning(
-                    f"Highlight {highlight.id} has invalid range: {start} >= {end}, skipping"
-                )
-                continue
-            
-            # Check for suspiciously short highlights
-            duration = end - start
-            if duration < 5:
-                logger.warning(
-                    f"Highlight {highlight.id} is suspiciously short ({duration}s), extending to 15s"
-                )
-                end = min(start + 15, media_duration)
-            
-            # Check for highlights at exactly 0:00 (often a bug)
-            if start == 0 and end <= 30 and media_duration > 120:
-                # Highlight at very start of long media is suspicious
-                logger.warning(
-                    f"Highlight {highlight.id} is at media start (0:00), may be invalid"
-                )
-                # Don't skip, but lower the score
-                highlight.score = highlight.score * 0.5
-            
-            # Create corrected highlight
-            valid_highlights.append(Highlight(
+        starts = np.fromiter((h.start for h in highlights), dtype=float, count=len(highlights))
+        ends = np.fromiter((h.end for h in highlights), dtype=float, count=len(highlights))
+        
+        # Clamp to media bounds
+        negative = starts < 0
+        overrun = ends > media_duration
+        starts = np.maximum(starts, 0)
+        ends = np.minimum(ends, media_duration)
+        
+        # Drop impossible ranges
+        valid = starts < ends
+        
+        # Extend suspiciously short highlights to 15s
+        short = valid & ((ends - starts) < 5)
+        ends = np.where(short, np.minimum(starts + 15, media_duration), ends)
+        
+        # Highlights at exactly 0:00 of long media are often a bug - lower their score
+        suspicious = valid & (starts == 0) & (ends <= 30) & (media_duration > 120)
+        
+        if negative.any():
+            logger.warning(f"{int(negative.sum())} highlight(s) had negative start time, clamped to 0")
+        if overrun.any():
+            logger.warning(
+                f"{int(overrun.sum())} highlight(s) exceeded duration ({media_duration}s), clamped"
+            )
+        if not valid.all():
+            logger.warning(f"Skipping {int((~valid).sum())} highlight(s) with invalid range")
+        if short.any():
+            logger.warning(f"{int(short.sum())} highlight(s) suspiciously short (<5s), extended to 15s")
+        if suspicious.any():
+            logger.warning(f"{int(suspicious.sum())} highlight(s) at media start (0:00), may be invalid")
+        
+        valid_highlights = [
+            Highlight(
                 id=highlight.id,
-                start=start,
-                end=end,
+                start=float(start),
+                end=float(end),
                 title=highlight.title,
                 description=highlight.description,
-                score=highlight.score,
+                score=highlight.score * 0.5 if is_suspicious else highlight.score,
                 tags=highlight.tags,
                 transcript_segment_ids=highlight.transcript_segment_ids
-            ))
+            )
+            for highlight, start, end, keep, is_suspicious
+            in zip(highlights, starts, ends, valid, suspicious)
+            if keep
+        ]
         
         return valid_highlights
 
@@ -2,12 +2,20 @@
 Media downloading service for YouTube, X Spaces, and other URLs
 """
 import asyncio
+import functools
+import os
 import re
-import subprocess
+import shutil
+import tempfile
+import threading
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
 import yt_dlp
+from yt_dlp.cookies import load_cookies
 import logging
 
 from config import settings
@@ -15,27 +23,137 @@ from models import MediaType, SourceType, MediaInfo
 
 logger = logging.getLogger(__name__)
 
+# yt-dlp holds the GIL for long stretches; bound how many downloads run at once
+MAX_DOWNLOAD_WORKERS = 4
+
+# How long an exported browser cookie snapshot is reused before re-reading Chrome's cookie DB
+COOKIE_REFRESH_SECONDS = 3600
+
+# Group 1: YouTube, group 2: X/Twitter Spaces
+_SOURCE_RE = re.compile(r'(youtube\.com|youtu\.be)|((?:twitter|x)\.com/i/spaces)', re.IGNORECASE)
+
+
+# X Space ID from a /spaces/<id> URL path
+_SPACE_ID_RE = re.compile(r'/spaces/(\w+)')
+
+# Extensions treated as audio-only (uploads carry the dot, yt-dlp info does not)
+_UPLOAD_AUDIO_EXTS = frozenset({'.mp3', '.m4a', '.aac', '.wav', '.ogg', '.opus', '.flac'})
+_DOWNLOAD_AUDIO_EXTS = frozenset({'mp3', 'm4a', 'aac', 'opus', 'wav'})
+
+# Container duration as printed by ffmpeg on stderr ("Duration: 00:01:23.45")
+_FFMPEG_DURATION_RE = re.compile(r'Duration: (\d+):(\d+):(\d+(?:\.\d+)?)')
+
+# Probed durations keyed by (path, mtime_ns, size) so a replaced file is re-probed
+_DURATION_CACHE: dict[tuple[str, int, int], float] = {}
+_DURATION_CACHE_SIZE = 256
+
+
+@functools.lru_cache(maxsize=2048)
+def _detect_source_type(url: str) -> SourceType:
+    """Detect the source type from URL (cached - URLs are resubmitted on retries)"""
+    match = _SOURCE_RE.search(url)
+    if match is None:
+        return SourceType.URL
+    if match.group(1):
+        return SourceType.YOUTUBE
+    return SourceType.X_SPACE
+
 
 class MediaDownloader:
     """Downloads media from various sources"""
     
     def __init__(self):
         self.upload_dir = settings.upload_dir
+        self._pool = ThreadPoolExecutor(
+            max_workers=MAX_DOWNLOAD_WORKERS,
+            thread_name_prefix="media-io",
+        )
+        # Chrome cookies exported once to a Netscape cookie file (see _get_cookiefile).
+        # Kept out of upload_dir, which is served publicly under /uploads.
+        self._cookiefile: Optional[Path] = None
+        self._cookies_loaded_at = float('-inf')
+        self._cookie_lock = threading.Lock()
+    
+    async def warm_up(self) -> None:
+        """
+        Pay yt-dlp's extractor registration cost once, at startup.
+        
+        Building a YoutubeDL imports and registers every extractor class;
+        Python keeps those modules cached, so later per-download instances
+        skip that work and only apply their options.
+        """
+        def _warm():
+            with yt_dlp.YoutubeDL({'quiet': True, 'no_warnings': True}):
+                pass
+        
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._pool, _warm)
+    
+    def _get_cookiefile(self) -> Optional[Path]:
+        """
+        Return a Netscape cookie file snapshot of Chrome's cookies.
+        
+        Reading cookies from the browser decrypts Chrome's whole cookie DB, so it
+        is done at most once per COOKIE_REFRESH_SECONDS instead of per download.
+        Blocking - call from the download pool. Returns None if Chrome cookies
+        are unavailable.
+        """
+        with self._cookie_lock:
+            if time.monotonic() - self._cookies_loaded_at < COOKIE_REFRESH_SECONDS:
+                return self._cookiefile
+            # Failed attempts are also remembered, so a missing Chrome isn't re-probed per call
+            self._cookies_loaded_at = time.monotonic()
+            tmp_path = None
+            try:
+                jar = load_cookies(None, ('chrome',), None)
+                fd, tmp_path = tempfile.mkstemp(prefix="spaceclip-cookies-", suffix=".txt")
+                os.close(fd)
+                jar.save(tmp_path, ignore_discard=True, ignore_expires=True)
+                # Swap the new snapshot in atomically; readers never see a half-written file
+                if self._cookiefile is None:
+                    self._cookiefile = Path(tmp_path)
+                else:
+                    os.replace(tmp_path, self._cookiefile)
+                tmp_path = None
+            except Exception as e:
+                logger.warning(f"Could not load Chrome cookies: {e}")
+            finally:
+                if tmp_path:
+                    Path(tmp_path).unlink(missing_ok=True)
+            return self._cookiefile
+    
+    def shutdown(self) -> None:
+        """Remove the cookie snapshot so session cookies don't outlive the process"""
+        with self._cookie_lock:
+            if self._cookiefile is not None:
+                self._cookiefile.unlink(missing_ok=True)
+                self._cookiefile = None
+            self._cookies_loaded_at = float('-inf')
+    
+    @contextmanager
+    def _private_cookiefile(self) -> Iterator[Optional[Path]]:
+        """
+        Yield a per-download copy of the cookie snapshot, removed afterwards.
+        
+        YoutubeDL saves its cookie jar back to 'cookiefile' on exit, so
+        concurrent downloads must not share the snapshot file itself.
+        """
+        snapshot = self._get_cookiefile()
+        if snapshot is None:
+            yield None
+            return
+        fd, path = tempfile.mkstemp(prefix="spaceclip-cookies-", suffix=".txt")
+        os.close(fd)
+        copy = Path(path)
+        try:
+            shutil.copyfile(snapshot, copy)
+            yield copy
+        finally:
+            copy.unlink(missing_ok=True)
     
     def detect_source_type(self, url: str) -> SourceType:
         """Detect the source type from URL"""
-        url_lower = url.lower()
-        
-        # YouTube
-        if any(domain in url_lower for domain in ['youtube.com', 'youtu.be']):
-            return SourceType.YOUTUBE
-        
-        # X/Twitter Spaces
-        if 'twitter.com/i/spaces' in url_lower or 'x.com/i/spaces' in url_lower:
-            return SourceType.X_SPACE
-        
-        # Generic URL
-        return SourceType.URL
+        return _detect_source_type(url)
     
     async def download_youtube(self, url: str) -> MediaInfo:
         """Download video/audio from YouTube"""
@@ -56,8 +174,8 @@ class MediaDownloader:
                 return info
         
         # Run in thread pool to not block
-        loop = asyncio.get_event_loop()
-        info = await loop.run_in_executor(None, _download)
+        loop = asyncio.get_running_loop()
+        info = await loop.run_in_executor(self._pool, _download)
         
         duration = info.get('duration', 0)
         title = info.get('title', 'Untitled')
@@ -92,18 +210,19 @@ class MediaDownloader:
             }],
             'quiet': True,
             'no_warnings': True,
-            # May need cookies for some spaces
-            'cookiesfrombrowser': ('chrome',),  # Try to use Chrome cookies
         }
         
         def _download():
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=True)
-                return info
+            # May need cookies for some spaces - use a private copy of the cached Chrome cookie snapshot
+            with self._private_cookiefile() as cookiefile:
+                opts = dict(ydl_opts, cookiefile=str(cookiefile)) if cookiefile else ydl_opts
+                with yt_dlp.YoutubeDL(opts) as ydl:
+                    info = ydl.extract_info(url, download=True)
+                    return info
         
         try:
-            loop = asyncio.get_event_loop()
-            info = await loop.run_in_executor(None, _download)
+            loop = asyncio.get_running_loop()
+            info = await loop.run_in_executor(self._pool, _download)
             
             duration = info.get('duration', 0)
             title = info.get('title', 'X Space')
@@ -127,7 +246,7 @@ class MediaDownloader:
         import requests
         
         # Extract space ID from URL
-        space_id_match = re.search(r'/spaces/(\w+)', url)
+        space_id_match = _SPACE_ID_RE.search(url)
         if not space_id_match:
             raise ValueError("Could not extract Space ID from URL")
         
@@ -147,11 +266,11 @@ class MediaDownloader:
                 info = ydl.extract_info(url, download=True)
                 return info
         
-        loop = asyncio.get_event_loop()
-        info = await loop.run_in_executor(None, _download)
+        loop = asyncio.get_running_loop()
+        info = await loop.run_in_executor(self._pool, _download)
         
         # Find the actual output file
-        for ext in ['m4a', 'mp3', 'aac', 'opus', 'webm']:
+        for ext in ('m4a', 'mp3', 'aac', 'opus', 'webm'):
             potential_path = self.upload_dir / f"{media_id}.{ext}"
             if potential_path.exists():
                 output_path = potential_path
@@ -182,15 +301,15 @@ class MediaDownloader:
                 info = ydl.extract_info(url, download=True)
                 return info
         
-        loop = asyncio.get_event_loop()
-        info = await loop.run_in_executor(None, _download)
+        loop = asyncio.get_running_loop()
+        info = await loop.run_in_executor(self._pool, _download)
         
         # Determine media type and find output file
         ext = info.get('ext', 'mp4')
         output_path = self.upload_dir / f"{media_id}.{ext}"
         
         # Check if it's audio or video
-        if info.get('vcodec') == 'none' or ext in ['mp3', 'm4a', 'aac', 'opus', 'wav']:
+        if info.get('vcodec') == 'none' or ext in _DOWNLOAD_AUDIO_EXTS:
             media_type = MediaType.AUDIO
         else:
             media_type = MediaType.VIDEO
@@ -220,20 +339,19 @@ class MediaDownloader:
         ext = file_path.suffix.lower()
         
         # Determine media type
-        audio_exts = {'.mp3', '.m4a', '.aac', '.wav', '.ogg', '.opus', '.flac'}
-        media_type = MediaType.AUDIO if ext in audio_exts else MediaType.VIDEO
+        media_type = MediaType.AUDIO if ext in _UPLOAD_AUDIO_EXTS else MediaType.VIDEO
         
         # Move to uploads directory with new name
         new_path = self.upload_dir / f"{media_id}{ext}"
         file_path.rename(new_path)
         
-        # Get duration using ffprobe
-        duration = await self._get_duration(new_path)
-        
-        # Generate thumbnail for video
         thumbnail_path = None
         if media_type == MediaType.VIDEO:
-            thumbnail_path = await self._generate_thumbnail(new_path, media_id)
+            # One ffmpeg run yields both the thumbnail and the duration
+            duration, thumbnail_path = await self._probe_and_thumb(new_path, media_id)
+        else:
+            # Get duration using ffprobe
+            duration = await self.get_duration(new_path)
         
         return MediaInfo(
             id=media_id,
@@ -246,22 +364,72 @@ class MediaDownloader:
             thumbnail_path=str(thumbnail_path) if thumbnail_path else None,
         )
     
-    async def _get_duration(self, file_path: Path) -> float:
-        """Get media duration using ffprobe"""
+    async def get_duration(self, file_path: Path) -> float:
+        """Get media duration using ffprobe (cached per file version)"""
+        try:
+            stat = file_path.stat()
+        except OSError:
+            return 0.0
+        
+        key = (str(file_path), stat.st_mtime_ns, stat.st_size)
+        cached = _DURATION_CACHE.get(key)
+        if cached is not None:
+            return cached
+        
         cmd = [
             'ffprobe', '-v', 'error', '-show_entries', 'format=duration',
             '-of', 'default=noprint_wrappers=1:nokey=1', str(file_path)
         ]
         
-        def _run():
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            try:
-                return float(result.stdout.strip())
-            except (ValueError, AttributeError):
-                return 0.0
+        # Await the child process directly instead of parking a pool thread on it
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        stdout, _ = await proc.communicate()
+        try:
+            duration = float(stdout.strip())
+        except ValueError:
+            return 0.0
+        
+        if len(_DURATION_CACHE) >= _DURATION_CACHE_SIZE:
+            _DURATION_CACHE.pop(next(iter(_DURATION_CACHE)))
+        _DURATION_CACHE[key] = duration
+        return duration
+    
+    async def _probe_and_thumb(
+        self,
+        video_path: Path,
+        media_id: str
+    ) -> tuple[float, Optional[Path]]:
+        """Generate thumbnail and read duration from a single ffmpeg invocation"""
+        thumbnail_path = self.upload_dir / f"{media_id}_thumb.jpg"
         
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, _run)
+        cmd = [
+            'ffmpeg', '-hide_banner', '-y', '-i', str(video_path),
+            '-ss', '00:00:01', '-vframes', '1',
+            '-vf', 'scale=320:-1',
+            str(thumbnail_path)
+        ]
+        
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        _, stderr = await proc.communicate()
+        
+        # ffmpeg prints the input's container duration while opening it
+        match = _FFMPEG_DURATION_RE.search(stderr.decode(errors='replace'))
+        if match:
+            hours, minutes, seconds = match.groups()
+            duration = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+        else:
+            # Duration: N/A (e.g. some streamed containers) - ask ffprobe
+            duration = await self.get_duration(video_path)
+        
+        return duration, thumbnail_path if thumbnail_path.exists() else None
     
     async def _generate_thumbnail(
         self, 
@@ -278,12 +446,13 @@ class MediaDownloader:
             str(thumbnail_path)
         ]
         
-        def _run():
-            subprocess.run(cmd, capture_output=True)
-            return thumbnail_path if thumbnail_path.exists() else None
-        
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, _run)
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        await proc.wait()
+        return thumbnail_path if thumbnail_path.exists() else None
     
     async def download(self, url: str) -> MediaInfo:
         """Download media from URL, auto-detecting source type"""
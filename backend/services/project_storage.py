@@ -2,18 +2,24 @@
 Project storage service for persistence
 Uses PostgreSQL for metadata and disk for file storage
 """
+import asyncio
 import logging
+import os
+from enum import Enum
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional
 from uuid import UUID
 
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from config import settings
+from models.database import async_session_maker
 from models import (
     ProjectState, MediaInfo, TranscriptionResult, HighlightAnalysis, 
-    ClipResult, TranscriptSegment, Highlight, ProcessingStatus
+    ClipResult, TranscriptSegment, Highlight, ProcessingStatus,
+    MediaType, SourceType, Platform,
 )
 from models.media_model import MediaModel
 from models.transcription_model import TranscriptionModel, TranscriptSegmentModel
@@ -28,33 +34,68 @@ from repositories.project_repository import (
 
 logger = logging.getLogger(__name__)
 
-# Storage directory for files (still needed for media and clip files)
+# Storage directory for files (still needed for media and clip files).
+# Created on first use rather than at import, so worker startup does no filesystem I/O.
 PROJECTS_DIR = settings.upload_dir / "projects"
-PROJECTS_DIR.mkdir(parents=True, exist_ok=True)
+_projects_dir_ready = False
+
+
+def _ensure_projects_dir() -> Path:
+    """Create PROJECTS_DIR once per process and return it"""
+    global _projects_dir_ready
+    if not _projects_dir_ready:
+        PROJECTS_DIR.mkdir(parents=True, exist_ok=True)
+        _projects_dir_ready = True
+    return PROJECTS_DIR
+
+# Stored string -> enum member lookups for the load path (no exception-based fallback)
+_STATUS_BY_VALUE = {s.value: s for s in ProcessingStatus}
+_MEDIA_TYPE_BY_VALUE = {m.value: m for m in MediaType}
+_SOURCE_TYPE_BY_VALUE = {s.value: s for s in SourceType}
+_PLATFORM_BY_VALUE = {p.value: p for p in Platform}
+
+
+def _as_uuid(value: UUID | str) -> UUID:
+    """Return value as a UUID, parsing only when given a string"""
+    return value if isinstance(value, UUID) else UUID(value)
+
+
+def _enum_value(value):
+    """Return an enum member's value, or the value unchanged if it's already plain"""
+    return value.value if isinstance(value, Enum) else value
 
 
 class ProjectStorage:
     """Handles project persistence to database and disk"""
     
     def __init__(self):
-        self.projects_dir = PROJECTS_DIR
         self.media_repo = media_repository
         self.transcription_repo = transcription_repository
         self.highlight_repo = highlight_repository
         self.clip_repo = clip_repository
     
+    @property
+    def projects_dir(self) -> Path:
+        """Project file directory, created on first access"""
+        return _ensure_projects_dir()
+    
     # -------------------------------------------------------------------------
     # Conversion helpers: ORM models <-> Pydantic models
     # -------------------------------------------------------------------------
     
+    # ORM rows are already typed by the database, so these build the Pydantic
+    # models with model_construct() and skip validation. Enum columns are
+    # stored as plain strings and are mapped to members via lookup tables.
+    
     def _media_model_to_pydantic(self, model: MediaModel) -> MediaInfo:
         """Convert SQLAlchemy MediaModel to Pydantic MediaInfo"""
-        return MediaInfo(
+        return MediaInfo.model_construct(
             id=str(model.id),
             filename=model.filename,
             original_filename=model.original_filename,
-            media_type=model.media_type,
-            source_type=model.source_type,
+            # Unknown legacy values pass through as the stored string
+            media_type=_MEDIA_TYPE_BY_VALUE.get(model.media_type, model.media_type),
+            source_type=_SOURCE_TYPE_BY_VALUE.get(model.source_type, model.source_type),
             source_url=model.source_url,
             duration=model.duration,
             file_path=model.file_path,
@@ -62,20 +103,18 @@ class ProjectStorage:
             created_at=model.created_at,
         )
     
-    def _transcription_model_to_pydantic(self, model: TranscriptionModel) -> TranscriptionResult:
-        """Convert SQLAlchemy TranscriptionModel to Pydantic TranscriptionResult"""
+    def _transcription_model_to_pydantic(
+        self,
+        model: TranscriptionModel,
+        segment_rows: list[tuple]
+    ) -> TranscriptionResult:
+        """Convert SQLAlchemy TranscriptionModel plus raw segment rows to Pydantic TranscriptionResult"""
+        construct = TranscriptSegment.model_construct
         segments = [
-            TranscriptSegment(
-                id=seg.segment_index,
-                start=seg.start_time,
-                end=seg.end_time,
-                text=seg.text,
-                speaker=seg.speaker,
-                confidence=seg.confidence,
-            )
-            for seg in model.segments
+            construct(id=i, start=start, end=end, text=text, speaker=speaker, confidence=confidence)
+            for i, start, end, text, speaker, confidence in segment_rows
         ]
-        return TranscriptionResult(
+        return TranscriptionResult.model_construct(
             media_id=str(model.media_id),
             language=model.language,
             segments=segments,
@@ -84,8 +123,9 @@ class ProjectStorage:
     
     def _highlights_to_pydantic(self, models: list[HighlightModel], media_id: str) -> HighlightAnalysis:
         """Convert SQLAlchemy HighlightModels to Pydantic HighlightAnalysis"""
+        construct = Highlight.model_construct
         highlights = [
-            Highlight(
+            construct(
                 id=h.highlight_id,
                 start=h.start_time,
                 end=h.end_time,
@@ -97,18 +137,18 @@ class ProjectStorage:
             )
             for h in models
         ]
-        return HighlightAnalysis(
+        return HighlightAnalysis.model_construct(
             media_id=media_id,
             highlights=highlights,
-            analyzed_at=models[0].created_at if models else datetime.utcnow(),
+            analyzed_at=models[0].created_at if models else datetime.now(timezone.utc),
         )
     
     def _clip_model_to_pydantic(self, model: ClipModel) -> ClipResult:
         """Convert SQLAlchemy ClipModel to Pydantic ClipResult"""
-        return ClipResult(
+        return ClipResult.model_construct(
             id=str(model.id),
             media_id=str(model.media_id),
-            platform=model.platform,
+            platform=_PLATFORM_BY_VALUE.get(model.platform, model.platform),
             file_path=model.file_path,
             duration=model.duration,
             width=model.width,
@@ -121,63 +161,72 @@ class ProjectStorage:
     # Save operations
     # -------------------------------------------------------------------------
     
-    async def save_project(self, db: AsyncSession, media_id: str, state: ProjectState, project_id: Optional[str] = None) -> None:
+    async def save_project(self, db: AsyncSession, media_id: UUID | str, state: ProjectState, project_id: Optional[UUID | str] = None) -> None:
         """Save project state to database"""
         try:
-            media_uuid = UUID(media_id)
-            project_uuid = UUID(project_id) if project_id else None
+            media_uuid = _as_uuid(media_id)
+            project_uuid = _as_uuid(project_id) if project_id else None
+            
+            status = _enum_value(state.status)
+            media = state.media
             
             # Check if media exists
             existing_media = await self.media_repo.get_by_id(db, media_uuid)
             
             if existing_media:
                 # Update existing media
-                existing_media.status = state.status.value if hasattr(state.status, 'value') else str(state.status)
+                existing_media.status = status
                 existing_media.progress = state.progress or 0
                 existing_media.error = state.error
-                if state.media:
-                    existing_media.duration = state.media.duration
-                    existing_media.thumbnail_path = state.media.thumbnail_path
+                if media:
+                    existing_media.duration = media.duration
+                    existing_media.thumbnail_path = media.thumbnail_path
                 # Update project_id if provided and not already set
                 if project_uuid and not existing_media.project_id:
                     existing_media.project_id = project_uuid
                 await self.media_repo.update(db, existing_media)
-            elif state.media:
+            elif media:
                 # Create new media entry with project_id
                 media_model = MediaModel(
                     id=media_uuid,
                     project_id=project_uuid,  # Link to user's project
-                    filename=state.media.filename,
-                    original_filename=state.media.original_filename,
-                    file_path=state.media.file_path,
-                    thumbnail_path=state.media.thumbnail_path,
-                    media_type=state.media.media_type.value if hasattr(state.media.media_type, 'value') else state.media.media_type,
-                    source_type=state.media.source_type.value if hasattr(state.media.source_type, 'value') else state.media.source_type,
-                    source_url=state.media.source_url,
-                    duration=state.media.duration,
-                    status=state.status.value if hasattr(state.status, 'value') else str(state.status),
+                    filename=media.filename,
+                    original_filename=media.original_filename,
+                    file_path=media.file_path,
+                    thumbnail_path=media.thumbnail_path,
+                    media_type=_enum_value(media.media_type),
+                    source_type=_enum_value(media.source_type),
+                    source_url=media.source_url,
+                    duration=media.duration,
+                    status=status,
                     progress=state.progress or 0,
                     error=state.error,
                 )
                 await self.media_repo.create(db, media_model)
             
-            # Save transcription if present
+            # Transcription, highlights and clips touch disjoint tables, so save
+            # them concurrently - each on its own session, since an AsyncSession
+            # can't be shared between tasks
+            saves = []
             if state.transcription:
-                await self._save_transcription(db, media_uuid, state.transcription)
-            
-            # Save highlights if present
+                saves.append(self._in_own_session(self._save_transcription, media_uuid, state.transcription))
             if state.highlights:
-                await self._save_highlights(db, media_uuid, state.highlights)
-            
-            # Save clips if present
+                saves.append(self._in_own_session(self._save_highlights, media_uuid, state.highlights))
             if state.clips:
-                await self._save_clips(db, media_uuid, state.clips)
+                saves.append(self._in_own_session(self._save_clips, media_uuid, state.clips))
+            if saves:
+                await asyncio.gather(*saves)
             
             logger.info(f"Saved project {media_id}")
         except Exception as e:
             logger.error(f"Failed to save project {media_id}: {e}")
             raise
     
+    async def _in_own_session(self, save, *args) -> None:
+        """Run a sub-save on a dedicated session from the pool"""
+        async with async_session_maker() as session:
+            await save(session, *args)
+    
     async def _save_transcription(
         self, 
         db: AsyncSession, 
@@ -185,10 +234,6 @@ class ProjectStorage:
         transcription: TranscriptionResult
     ) -> None:
         """Save or update transcription"""
-        # Delete existing transcription if any
-        await self.transcription_repo.delete_by_media_id(db, media_id)
-        
-        # Create new transcription
         transcription_model = TranscriptionModel(
             media_id=media_id,
             language=transcription.language,
@@ -197,7 +242,7 @@ class ProjectStorage:
         
         segments = [
             TranscriptSegmentModel(
-                transcription_id=None,  # Will be set by create_with_segments
+                transcription_id=None,  # Will be set by upsert_with_segments
                 segment_index=seg.id,
                 start_time=seg.start,
                 end_time=seg.end,
@@ -208,7 +253,8 @@ class ProjectStorage:
             for seg in transcription.segments
         ]
         
-        await self.transcription_repo.create_with_segments(db, transcription_model, segments)
+        # Upsert in place: unchanged segments aren't deleted and rewritten
+        await self.transcription_repo.upsert_with_segments(db, transcription_model, segments)
     
     async def _save_highlights(
         self, 
@@ -217,10 +263,6 @@ class ProjectStorage:
         highlight_analysis: HighlightAnalysis
     ) -> None:
         """Save or update highlights"""
-        # Delete existing highlights
-        await self.highlight_repo.delete_by_media_id(db, media_id)
-        
-        # Create new highlights
         highlight_models = [
             HighlightModel(
                 media_id=media_id,
@@ -236,8 +278,8 @@ class ProjectStorage:
             for h in highlight_analysis.highlights
         ]
         
-        if highlight_models:
-            await self.highlight_repo.create_many(db, highlight_models)
+        # Upsert on highlight_id and prune highlights that are no longer present
+        await self.highlight_repo.upsert_many(db, media_id, highlight_models)
     
     async def _save_clips(
         self, 
@@ -246,57 +288,58 @@ class ProjectStorage:
         clips: list[ClipResult]
     ) -> None:
         """Save clips (additive - doesn't delete existing)"""
+        rows = []
+        invalid_ids = []
         for clip in clips:
-            # Check if clip already exists (by ID)
             try:
                 clip_uuid = UUID(clip.id)
-                existing_clips = await self.clip_repo.get_by_media_id(db, media_id)
-                existing_ids = {str(c.id) for c in existing_clips}
-                
-                if clip.id not in existing_ids:
-                    clip_model = ClipModel(
-                        id=clip_uuid,
-                        media_id=media_id,
-                        platform=clip.platform.value if hasattr(clip.platform, 'value') else clip.platform,
-                        file_path=clip.file_path,
-                        start_time=clip.start,  # Absolute timestamp in source media
-                        end_time=clip.end,      # Absolute timestamp in source media
-                        duration=clip.duration,
-                        width=clip.width,
-                        height=clip.height,
-                        has_captions=clip.has_captions,
-                    )
-                    await self.clip_repo.create(db, clip_model)
-            except Exception as e:
-                logger.error(f"Failed to save clip {clip.id}: {e}")
+            except ValueError:
+                invalid_ids.append(clip.id)
+                continue
+            rows.append({
+                "id": clip_uuid,
+                "media_id": media_id,
+                "platform": _enum_value(clip.platform),
+                "file_path": clip.file_path,
+                "start_time": clip.start,  # Absolute timestamp in source media
+                "end_time": clip.end,      # Absolute timestamp in source media
+                "duration": clip.duration,
+                "width": clip.width,
+                "height": clip.height,
+                "has_captions": clip.has_captions,
+            })
+        
+        if invalid_ids:
+            logger.error(f"Skipped {len(invalid_ids)} clip(s) with invalid IDs for {media_id}: {invalid_ids}")
+        
+        # Existing clips (by ID) are skipped by the database - no read needed
+        try:
+            await self.clip_repo.insert_many_ignore_existing(db, rows)
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to save clips for {media_id}: {e}")
+            await db.rollback()
     
     # -------------------------------------------------------------------------
     # Load operations
     # -------------------------------------------------------------------------
     
-    async def load_project(self, db: AsyncSession, media_id: str, user_id: Optional[str] = None) -> Optional[ProjectState]:
+    async def load_project(self, db: AsyncSession, media_id: UUID | str, user_id: Optional[UUID | str] = None) -> Optional[ProjectState]:
         """Load project state from database with optional user ownership check."""
         try:
-            media_uuid = UUID(media_id)
+            media_uuid = _as_uuid(media_id)
+            media_id_str = str(media_uuid)
 
-            # Load media with all relations
-            media_model = await self.media_repo.get_by_id_with_relations(db, media_uuid)
-            if not media_model:
+            # Load media with all relations, plus the owning user via the project join
+            row = await self.media_repo.get_with_owner(db, media_uuid, with_relations=True)
+            if not row:
                 return None
+            media_model, owner_id = row
 
-            # Resolve owning user + project from the media's project_id
-            resolved_user_id: Optional[str] = None
-            resolved_project_id: Optional[str] = None
-
-            if media_model.project_id:
-                resolved_project_id = str(media_model.project_id)
-                from repositories.project_repository import project_repository
-                project = await project_repository.get_by_id(db, media_model.project_id)
-                if project:
-                    resolved_user_id = str(project.user_id)
+            resolved_user_id: Optional[str] = str(owner_id) if owner_id else None
+            resolved_project_id: Optional[str] = str(media_model.project_id) if media_model.project_id else None
 
             # Ownership check: if caller provided user_id, enforce it
-            if user_id and resolved_user_id and resolved_user_id != user_id:
+            if user_id and owner_id and owner_id != _as_uuid(user_id):
                 # Media belongs to a different user
                 return None
 
@@ -305,19 +348,17 @@ class ProjectStorage:
 
             transcription = None
             if media_model.transcription:
-                transcription = self._transcription_model_to_pydantic(media_model.transcription)
+                segment_rows = await self.transcription_repo.get_segments_raw(db, media_model.transcription.id)
+                transcription = self._transcription_model_to_pydantic(media_model.transcription, segment_rows)
 
             highlights = None
             if media_model.highlights:
-                highlights = self._highlights_to_pydantic(media_model.highlights, media_id)
+                highlights = self._highlights_to_pydantic(media_model.highlights, media_id_str)
 
             clips = [self._clip_model_to_pydantic(c) for c in media_model.clips]
 
             # Map status string to enum
-            try:
-                status = ProcessingStatus(media_model.status)
-            except ValueError:
-                status = ProcessingStatus.PENDING
+            status = _STATUS_BY_VALUE.get(media_model.status, ProcessingStatus.PENDING)
 
             return ProjectState(
                 user_id=resolved_user_id,
@@ -330,60 +371,36 @@ class ProjectStorage:
                 highlights=highlights,
                 clips=clips,
             )
-        except Exception as e:
+        except (ValueError, SQLAlchemyError) as e:
             logger.error(f"Failed to load project {media_id}: {e}")
             return None
     
-    async def list_projects(self, db: AsyncSession, user_id: Optional[str] = None, include_archived: bool = False) -> list[dict]:
+    async def list_projects(self, db: AsyncSession, user_id: Optional[UUID | str] = None, include_archived: bool = False) -> list[dict]:
         """List saved media for current user only"""
         try:
             if not user_id:
                 # No user - return empty list to prevent data leakage
                 return []
 
-            # Get user's projects first
-            from repositories.project_repository import project_repository
-            user_projects = await project_repository.get_by_user_id(db, UUID(user_id))
-            project_ids = [p.id for p in user_projects]
-
-            # Get media belonging to user's projects ONLY
-            media_list = []
-            for project_id in project_ids:
-                project_media = await self.media_repo.get_by_project_id(db, project_id)
-                media_list.extend(project_media)
+            # Media, counts and ordering all come back in a single round-trip
+            rows = await self.media_repo.list_with_counts(db, _as_uuid(user_id), include_archived)
             
-            projects = []
-            seen_ids = set()  # Prevent duplicates
-            for media in media_list:
-                if str(media.id) in seen_ids:
-                    continue
-                seen_ids.add(str(media.id))
-                
-                # Skip archived media unless explicitly requested
-                if not include_archived and media.status == "archived":
-                    continue
-
-                
-                # Get highlight count
-                highlights = await self.highlight_repo.get_by_media_id(db, media.id)
-                clips = await self.clip_repo.get_by_media_id(db, media.id)
-                
-                projects.append({
+            projects = [
+                {
                     "media_id": str(media.id),
                     "title": media.original_filename or media.filename or "Untitled",
                     "media_type": media.media_type,
                     "duration": media.duration,
                     "status": media.status,
                     "saved_at": media.updated_at.isoformat() if media.updated_at else None,
-                    "clips_count": len(clips),
-                    "highlights_count": len(highlights),
-                })
-            
-            # Sort by saved_at descending
-            projects.sort(key=lambda x: x["saved_at"] or "", reverse=True)
+                    "clips_count": clips_count,
+                    "highlights_count": highlights_count,
+                }
+                for media, highlights_count, clips_count in rows
+            ]
             
             return projects
-        except Exception as e:
+        except (ValueError, SQLAlchemyError) as e:
             logger.error(f"Failed to list projects: {e}")
             return []
     
@@ -391,38 +408,28 @@ class ProjectStorage:
     # Delete operations
     # -------------------------------------------------------------------------
     
-    async def delete_project_async(self, db: AsyncSession, media_id: str, user_id: Optional[str] = None) -> bool:
+    async def delete_project_async(self, db: AsyncSession, media_id: UUID | str, user_id: Optional[UUID | str] = None) -> bool:
         """Delete a saved project and its associated files (async version)"""
         try:
-            media_uuid = UUID(media_id)
+            media_uuid = _as_uuid(media_id)
             
-            # Get media to find file paths
-            media_model = await self.media_repo.get_by_id(db, media_uuid)
+            # Get media (to find file paths) and its owner in one query
+            row = await self.media_repo.get_with_owner(db, media_uuid)
             
-            if media_model:
+            if row:
+                media_model, owner_id = row
                 # Verify ownership if user_id provided
-                if user_id and media_model.project_id:
-                    from repositories.project_repository import project_repository
-                    project = await project_repository.get_by_id(db, media_model.project_id)
-                    if project and str(project.user_id) != user_id:
-                        logger.warning(f"User {user_id} attempted to delete media {media_id} owned by another user")
-                        return False
+                if user_id and owner_id and owner_id != _as_uuid(user_id):
+                    logger.warning(f"User {user_id} attempted to delete media {media_id} owned by another user")
+                    return False
                 
                 # Get clips to delete their files
                 clips = await self.clip_repo.get_by_media_id(db, media_uuid)
                 
-                # Delete clip files
-                for clip in clips:
-                    clip_path = Path(clip.file_path)
-                    if clip_path.exists():
-                        clip_path.unlink()
-                        logger.info(f"Deleted clip file: {clip_path}")
-                
-                # Delete media file
-                media_path = Path(media_model.file_path)
-                if media_path.exists():
-                    media_path.unlink()
-                    logger.info(f"Deleted media file: {media_path}")
+                # Delete clip and media files off the event loop
+                await asyncio.to_thread(
+                    self._unlink_files, [c.file_path for c in clips] + [media_model.file_path]
+                )
                 
                 # Delete from database (cascades to related tables)
                 await self.media_repo.delete(db, media_uuid)
@@ -430,115 +437,75 @@ class ProjectStorage:
                 return True
             
             return False
-        except Exception as e:
+        except (ValueError, OSError, SQLAlchemyError) as e:
             logger.error(f"Failed to delete project {media_id}: {e}")
             return False
     
-    async def archive_media(self, db: AsyncSession, media_id: str, user_id: Optional[str] = None) -> bool:
+    async def archive_media(self, db: AsyncSession, media_id: UUID | str, user_id: Optional[UUID | str] = None) -> bool:
         """Archive a media item (soft delete)"""
         try:
-            media_uuid = UUID(media_id)
-            media_model = await self.media_repo.get_by_id(db, media_uuid)
+            media_uuid = _as_uuid(media_id)
             
-            if not media_model:
+            # Single UPDATE; ownership is checked in the WHERE clause
+            if not await self.media_repo.update_status_if_owner(
+                db, media_uuid, "archived", _as_uuid(user_id) if user_id else None
+            ):
                 return False
-            
-            # Verify ownership if user_id provided
-            if user_id and media_model.project_id:
-                from repositories.project_repository import project_repository
-                project = await project_repository.get_by_id(db, media_model.project_id)
-                if project and str(project.user_id) != user_id:
-                    return False
-            
-            # Update status to archived
-            await self.media_repo.update_status(db, media_uuid, "archived")
             logger.info(f"Archived media {media_id}")
             return True
-        except Exception as e:
+        except (ValueError, SQLAlchemyError) as e:
             logger.error(f"Failed to archive media {media_id}: {e}")
             return False
     
-    async def unarchive_media(self, db: AsyncSession, media_id: str, user_id: Optional[str] = None) -> bool:
+    async def unarchive_media(self, db: AsyncSession, media_id: UUID | str, user_id: Optional[UUID | str] = None) -> bool:
         """Unarchive a media item"""
         try:
-            media_uuid = UUID(media_id)
-            media_model = await self.media_repo.get_by_id(db, media_uuid)
+            media_uuid = _as_uuid(media_id)
             
-            if not media_model:
+            # Status goes back to complete (or pending if never processed), decided server-side
+            if not await self.media_repo.restore_status_if_owner(
+                db, media_uuid, _as_uuid(user_id) if user_id else None
+            ):
                 return False
-            
-            # Verify ownership if user_id provided
-            if user_id and media_model.project_id:
-                from repositories.project_repository import project_repository
-                project = await project_repository.get_by_id(db, media_model.project_id)
-                if project and str(project.user_id) != user_id:
-                    return False
-            
-            # Update status to complete (or pending if never processed)
-            new_status = "complete" if media_model.progress >= 1.0 else "pending"
-            await self.media_repo.update_status(db, media_uuid, new_status)
             logger.info(f"Unarchived media {media_id}")
             return True
-        except Exception as e:
+        except (ValueError, SQLAlchemyError) as e:
             logger.error(f"Failed to unarchive media {media_id}: {e}")
             return False
     
-    def delete_project(self, media_id: str) -> bool:
-        """
-        Synchronous version of delete_project - deletes files only.
-        
-        Note: This is a compatibility method for synchronous contexts.
-        It only deletes files from disk, not database records.
-        Use delete_project_async for full deletion.
-        """
-        deleted = False
-        
-        # Delete associated media files
-        for ext in ['m4a', 'mp3', 'wav', 'mp4', 'webm', 'ogg']:
-            media_path = settings.upload_dir / f"{media_id}.{ext}"
-            if media_path.exists():
-                media_path.unlink()
-                logger.info(f"Deleted media file: {media_path}")
-                deleted = True
-        
-        # Delete generated clips (all files starting with media_id prefix)
-        for clip_file in settings.output_dir.glob(f"*"):
-            if str(clip_file.name).startswith(media_id[:8]):
-                clip_file.unlink()
-                logger.info(f"Deleted clip file: {clip_file}")
-                deleted = True
-        
-        return deleted
+    def _unlink_files(self, paths: list[str]) -> None:
+        """Delete files, ignoring ones already gone (blocking - run via asyncio.to_thread)"""
+        for path in paths:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                continue
+            logger.info(f"Deleted file: {path}")
     
-    async def clear_project_clips(self, db: AsyncSession, media_id: str) -> bool:
+    async def clear_project_clips(self, db: AsyncSession, media_id: UUID | str) -> bool:
         """Clear all generated clips for a project"""
         try:
-            media_uuid = UUID(media_id)
+            media_uuid = _as_uuid(media_id)
             
             # Get clips to delete their files
             clips = await self.clip_repo.get_by_media_id(db, media_uuid)
-            
-            for clip in clips:
-                clip_path = Path(clip.file_path)
-                if clip_path.exists():
-                    clip_path.unlink()
-                    logger.info(f"Deleted clip file: {clip_path}")
+            await asyncio.to_thread(self._unlink_files, [c.file_path for c in clips])
             
             # Delete from database
             await self.clip_repo.delete_by_media_id(db, media_uuid)
             
             logger.info(f"Cleared clips for project {media_id}")
             return True
-        except Exception as e:
+        except (ValueError, OSError, SQLAlchemyError) as e:
             logger.error(f"Failed to clear clips for {media_id}: {e}")
             return False
     
-    async def project_exists(self, db: AsyncSession, media_id: str) -> bool:
+    async def project_exists(self, db: AsyncSession, media_id: UUID | str) -> bool:
         """Check if a project exists"""
         try:
-            media_uuid = UUID(media_id)
+            media_uuid = _as_uuid(media_id)
             return await self.media_repo.exists(db, media_uuid)
-        except Exception:
+        except (ValueError, SQLAlchemyError):
             return False
 
 
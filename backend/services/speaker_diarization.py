@@ -3,23 +3,250 @@ Speaker diarization service using pyannote.audio for accurate speaker detection
 Falls back to energy-based detection if pyannote is unavailable
 """
 import asyncio
+import concurrent.futures
+import hashlib
+import json
 import logging
-import subprocess
+import os
+import re
 import tempfile
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Optional
 import numpy as np
 
+from config import settings
+from ffmpeg_limits import ffmpeg_slots
+from services.media_downloader import media_downloader
+
 logger = logging.getLogger(__name__)
 
 # Try to import pyannote - it's optional but recommended
 PYANNOTE_AVAILABLE = False
 try:
+    import torch
     from pyannote.audio import Pipeline
     PYANNOTE_AVAILABLE = True
 except ImportError:
     logger.warning("pyannote.audio not available. Using fallback speaker detection.")
 
+# Patterns for self-identification (with capture groups for names)
+# These are conservative patterns that require explicit name statements
+_IDENTIFICATION_PATTERNS = [
+    # "I'm X" / "I am X"
+    (re.compile(r"\b(?:i'?m|i am)\s+([A-Z][a-z]{2,15})\b", re.IGNORECASE), 0.9),
+    # "My name is X"
+    (re.compile(r"\bmy name is\s+([A-Z][a-z]{2,15})\b", re.IGNORECASE), 0.95),
+    # "This is X" (at start of segment, often podcast intros)
+    (re.compile(r"^(?:hey,?\s+)?this is\s+([A-Z][a-z]{2,15})\b", re.IGNORECASE), 0.85),
+    # "X here" (common podcast intro)
+    (re.compile(r"^([A-Z][a-z]{2,15})\s+here\b", re.IGNORECASE), 0.8),
+    # "Call me X"
+    (re.compile(r"\bcall me\s+([A-Z][a-z]{2,15})\b", re.IGNORECASE), 0.85),
+]
+
+# Patterns for third-party introduction
+# "Welcome X" / "Thanks X" / "Here's X"
+_INTRODUCTION_PATTERNS = [
+    (re.compile(r"\bwelcome(?:,| back)?\s+([A-Z][a-z]{2,15})\b", re.IGNORECASE), 0.7),
+    (re.compile(r"\bthank(?:s| you),?\s+([A-Z][a-z]{2,15})\b", re.IGNORECASE), 0.65),
+    (re.compile(r"\bhere(?:'s| is)\s+([A-Z][a-z]{2,15})\b", re.IGNORECASE), 0.7),
+]
+
+# Every pattern above needs one of these trigger words, so a single scan for
+# them lets segments without any skip all eight pattern passes
+_NAME_TRIGGER_RE = re.compile(r"\b(?:i'?m|i am|my name is|this is|here|call me|welcome|thank)", re.IGNORECASE)
+# Shortest text any pattern can match ("im Bob"); shorter segments are skipped
+_MIN_NAME_TEXT_LEN = 6
+
+# Fallback voice activity detection: RMS energy over short frames of decoded PCM
+VAD_SAMPLE_RATE = 8000         # Hz, mono - plenty for speech energy
+VAD_FRAME_SECONDS = 0.1        # 100 ms analysis frames
+VAD_SILENCE_DB = -30.0         # Frames below this RMS level (dBFS) count as silence
+VAD_MIN_SILENCE_SECONDS = 0.5  # Shorter pauses don't split speech
+VAD_MIN_SPEECH_SECONDS = 0.5   # Shorter bursts are dropped
+
+# Long recordings are diarized as overlapping windows run in parallel, then
+# speakers are matched across windows by their embedding centroids
+DIAR_CHUNK_SECONDS = 600.0           # 10 minute windows
+DIAR_CHUNK_OVERLAP_SECONDS = 10.0    # Audio shared by neighbouring windows
+DIAR_SPEAKER_MATCH_SIMILARITY = 0.5  # Min cosine similarity to treat two window speakers as one
+
+# Diarization results kept on disk; least recently used entries are evicted past this
+DIAR_CACHE_MAX_ENTRIES = 500
+
+# Names to ignore (common false positives)
+_IGNORE_NAMES = frozenset({
+    'Thanks', 'Thank', 'Hello', 'Welcome', 'Sorry', 'Sure', 'Well',
+    'Okay', 'Right', 'Actually', 'Really', 'Definitely', 'Absolutely',
+    'Yeah', 'Yes', 'No', 'Now', 'So', 'Look', 'See', 'Here', 'There'
+})
+
+
+@dataclass
+class SegmentBatch:
+    """Segments as parallel arrays; speaker_id indexes into labels (-1 = no speaker)"""
+    start: np.ndarray       # float64 seconds
+    end: np.ndarray         # float64 seconds
+    speaker_id: np.ndarray  # int32
+    labels: list[str]
+    
+    def __len__(self) -> int:
+        return len(self.start)
+    
+    @classmethod
+    def from_dicts(cls, segments: list[dict]) -> "SegmentBatch":
+        """Build from segment dicts; a missing end means a one second segment"""
+        n = len(segments)
+        start = np.fromiter((seg.get("start", 0) for seg in segments), dtype=np.float64, count=n)
+        end = np.fromiter(
+            (seg.get("end", seg.get("start", 0) + 1) for seg in segments),
+            dtype=np.float64, count=n
+        )
+        
+        label_ids: dict[str, int] = {}
+        speaker_id = np.fromiter(
+            (
+                label_ids.setdefault(speaker, len(label_ids)) if speaker else -1
+                for speaker in (seg.get("speaker") for seg in segments)
+            ),
+            dtype=np.int32, count=n
+        )
+        return cls(start, end, speaker_id, list(label_ids))
+    
+    def to_dicts(self) -> list[dict]:
+        """Convert back to [{"start": float, "end": float, "speaker": str | None}]"""
+        labels = self.labels
+        return [
+            {"start": start, "end": end, "speaker": labels[sid] if sid >= 0 else None}
+            for start, end, sid in zip(self.start.tolist(), self.end.tolist(), self.speaker_id.tolist())
+        ]
+    
+    def sorted_by_start(self) -> "SegmentBatch":
+        order = np.argsort(self.start, kind="stable")
+        return SegmentBatch(self.start[order], self.end[order], self.speaker_id[order], self.labels)
+    
+    def write_speakers(self, segments: list[dict]) -> None:
+        """Copy speaker labels onto the matching dicts in place, skipping unlabelled rows"""
+        labels = self.labels
+        for seg, sid in zip(segments, self.speaker_id.tolist()):
+            if sid >= 0:
+                seg["speaker"] = labels[sid]
+
+
+class _SharedBackboneEmbedding:
+    """
+    Drop-in for pyannote's WeSpeaker embedding step that runs the ResNet once per chunk
+    
+    pyannote feeds every (chunk, local speaker) pair through the full model, so
+    each chunk's audio is encoded once per speaker. Consecutive batch rows that
+    share a waveform are encoded once here and only the mask-weighted stats
+    pooling runs per speaker. Rows with an empty mask are skipped and come back
+    as NaN, as pyannote already does for too-short speech.
+    """
+    
+    def __init__(self, inner):
+        self._inner = inner
+        self._enabled = True
+    
+    def __getattr__(self, name):
+        return getattr(self._inner, name)
+    
+    def __call__(self, waveforms, masks=None):
+        if masks is None or not self._enabled:
+            return self._inner(waveforms, masks=masks)
+        try:
+            return self._embed(waveforms, masks)
+        except Exception as e:
+            # Model internals differ from what we expect - stay on the stock path
+            logger.warning(f"Shared-backbone embedding disabled: {e}")
+            self._enabled = False
+            return self._inner(waveforms, masks=masks)
+    
+    def _embed(self, waveforms, masks) -> np.ndarray:
+        model = self._inner.model_
+        resnet = model.resnet
+        device = self._inner.device
+        
+        masks = torch.as_tensor(masks)
+        embeddings = np.full((masks.shape[0], self._inner.dimension), np.nan, dtype=np.float32)
+        active = (masks.sum(dim=1) > 0).cpu()
+        if not active.any():
+            return embeddings
+        
+        waveforms = torch.as_tensor(waveforms)[active]
+        masks = masks[active]
+        
+        # Rows of the same chunk are adjacent and carry identical audio
+        repeat = torch.zeros(waveforms.shape[0], dtype=torch.bool)
+        repeat[1:] = (waveforms[1:] == waveforms[:-1]).flatten(1).all(dim=1)
+        chunk_of_row = torch.cumsum(~repeat, dim=0) - 1
+        
+        with torch.inference_mode():
+            fbank = model.compute_fbank(waveforms[~repeat].to(device))
+            
+            # ResNet trunk, as in WeSpeaker's ResNet.forward up to pooling
+            x = fbank.permute(0, 2, 1).unsqueeze(1)
+            x = torch.relu(resnet.bn1(resnet.conv1(x)))
+            x = resnet.layer4(resnet.layer3(resnet.layer2(resnet.layer1(x))))
+            
+            stats = resnet.pool(x[chunk_of_row.to(device)], weights=masks.to(device))
+            embed = resnet.seg_1(stats)
+            if resnet.two_emb_layer:
+                embed = resnet.seg_2(resnet.seg_bn_1(torch.relu(embed)))
+        
+        embeddings[active.numpy()] = embed.cpu().numpy()
+        return embeddings
+
+
+def _share_embedding_backbone(pipeline) -> None:
+    """Swap in _SharedBackboneEmbedding when the pipeline uses a WeSpeaker ResNet"""
+    embedding = getattr(pipeline, "_embedding", None)
+    model = getattr(embedding, "model_", None)
+    resnet = getattr(model, "resnet", None)
+    if not hasattr(model, "compute_fbank") or not hasattr(resnet, "pool"):
+        logger.info("Embedding model is not a WeSpeaker ResNet; using stock pyannote embeddings")
+        return
+    pipeline._embedding = _SharedBackboneEmbedding(embedding)
+
+
+def _quantize_for_cpu(pipeline) -> None:
+    """Dynamic int8 quantization of the pyannote models (CPU inference only)"""
+    if torch.cuda.is_available():
+        logger.info("GPU available; skipping int8 quantization of diarization models")
+        return
+    
+    try:
+        # Segmentation is SincNet + LSTM + Linear; the LSTM dominates on CPU
+        segmentation = pipeline._segmentation
+        segmentation.model = torch.ao.quantization.quantize_dynamic(
+            segmentation.model, {torch.nn.LSTM, torch.nn.Linear}, dtype=torch.qint8
+        )
+        # The embedding ResNet is convolutional; only its projection heads quantize dynamically
+        embedding = pipeline._embedding
+        embedding.model_ = torch.ao.quantization.quantize_dynamic(
+            embedding.model_, {torch.nn.Linear}, dtype=torch.qint8
+        )
+        logger.info("Quantized diarization models to int8")
+    except Exception as e:
+        logger.warning(f"Could not quantize diarization models: {e}")
+
+
+def _set_segmentation_step(pipeline, step: float) -> None:
+    """
+    Set how far the segmentation window slides, as a fraction of its length
+    
+    The segmentation model ends in a bidirectional LSTM, so activations from
+    overlapping windows can't be reused; a larger step is the only way to do
+    less overlapped work. Each frame is still scored by ~1/step windows.
+    """
+    segmentation = getattr(pipeline, "_segmentation", None)
+    if segmentation is None or step == getattr(pipeline, "segmentation_step", None):
+        return
+    pipeline.segmentation_step = step
+    segmentation.step = step * segmentation.duration
+    logger.info(f"Diarization segmentation step set to {segmentation.step:.1f}s")
+
 
 class SpeakerDiarization:
     """
@@ -29,9 +256,18 @@ class SpeakerDiarization:
     falls back to energy-based heuristics otherwise.
     """
     
-    def __init__(self):
+    def __init__(self, cache_dir: Optional[Path] = None):
         self._pipeline = None
         self._model_loaded = False
+        self._device = None
+        # pyannote results keyed by file version (path, size, mtime) + speaker options
+        self.cache_dir = cache_dir or settings.cache_dir / "diarization"
+        # Dedicated bounded pool so concurrent requests queue for the model
+        # instead of piling inferences onto the default executor
+        self._infer_pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=settings.diarization_workers,
+            thread_name_prefix="diarization",
+        )
     
     @property
     def pipeline(self):
@@ -43,12 +279,24 @@ class SpeakerDiarization:
             try:
                 # Use the pre-trained speaker diarization pipeline
                 # Note: Requires accepting pyannote terms on HuggingFace
+                # Weights come from the shared HF cache volume, so workers and
+                # restarts load from disk instead of downloading again
                 self._pipeline = Pipeline.from_pretrained(
                     "pyannote/speaker-diarization-3.1",
-                    use_auth_token=None  # Set HF_TOKEN env var if needed
+                    use_auth_token=None,  # Set HF_TOKEN env var if needed
+                    cache_dir=settings.hf_cache_dir,
                 )
+                self._device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+                if self._device.type == "cuda":
+                    # Input windows are fixed size, so cuDNN's autotuned kernels stay valid
+                    torch.backends.cudnn.benchmark = True
+                    self._pipeline.to(self._device)
                 self._model_loaded = True
                 logger.info("Loaded pyannote speaker diarization model")
+                if settings.diarization_int8:
+                    _quantize_for_cpu(self._pipeline)
+                _share_embedding_backbone(self._pipeline)
+                _set_segmentation_step(self._pipeline, settings.diarization_segmentation_step)
             except Exception as e:
                 logger.warning(f"Could not load pyannote model: {e}")
                 self._model_loaded = True  # Don't retry
@@ -75,12 +323,77 @@ class SpeakerDiarization:
             List of segments: [{"start": float, "end": float, "speaker": str}]
         """
         if self.pipeline is not None:
-            return await self._diarize_pyannote(
+            # Re-runs on an unchanged file reuse the stored result
+            cache_path = await asyncio.to_thread(
+                self._cache_path, audio_path, num_speakers, min_speakers, max_speakers
+            )
+            cached = await asyncio.to_thread(self._load_cached, cache_path)
+            if cached is not None:
+                logger.info(f"Using cached diarization for {audio_path.name}")
+                return cached
+            
+            segments = await self._diarize_pyannote(
                 audio_path, num_speakers, min_speakers, max_speakers
             )
+            await asyncio.to_thread(self._store_cached, cache_path, segments)
+            return segments
         else:
             return await self._diarize_fallback(audio_path)
     
+    def _cache_path(
+        self,
+        audio_path: Path,
+        num_speakers: Optional[int],
+        min_speakers: int,
+        max_speakers: int
+    ) -> Path:
+        """Cache file for this file version and speaker options (stat only, no content read)"""
+        stat = audio_path.stat()
+        digest = hashlib.blake2b(
+            f"{audio_path.resolve()}:{stat.st_size}:{stat.st_mtime_ns}".encode(), digest_size=20
+        )
+        options = f"{num_speakers}-{min_speakers}-{max_speakers}"
+        return self.cache_dir / f"{digest.hexdigest()}-{options}.diar.json"
+    
+    def _load_cached(self, cache_path: Path) -> Optional[list[dict]]:
+        """Read cached diarization segments, or None on a miss"""
+        try:
+            with open(cache_path) as f:
+                segments = json.load(f)
+            # Bump mtime so eviction drops the least recently used entries
+            os.utime(cache_path)
+            return segments
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable diarization cache {cache_path.name}: {e}")
+            return None
+    
+    def _store_cached(self, cache_path: Path, segments: list[dict]) -> None:
+        """Write diarization segments atomically so readers never see a partial file"""
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile('w', dir=self.cache_dir, suffix='.tmp', delete=False) as f:
+                json.dump(segments, f)
+            os.replace(f.name, cache_path)
+            self._evict_cached()
+        except OSError as e:
+            logger.warning(f"Could not cache diarization result: {e}")
+    
+    def _evict_cached(self) -> None:
+        """Drop the least recently used cache entries beyond DIAR_CACHE_MAX_ENTRIES"""
+        entries = []
+        for path in self.cache_dir.glob("*.diar.json"):
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except FileNotFoundError:
+                continue  # Evicted concurrently
+        if len(entries) <= DIAR_CACHE_MAX_ENTRIES:
+            return
+        entries.sort()
+        for _, path in entries[:len(entries) - DIAR_CACHE_MAX_ENTRIES]:
+            path.unlink(missing_ok=True)
+    
     async def _diarize_pyannote(
         self,
         audio_path: Path,
@@ -89,43 +402,122 @@ class SpeakerDiarization:
         max_speakers: int
     ) -> list[dict]:
         """Use pyannote.audio for accurate diarization"""
+        # Configure pipeline parameters
+        params = {}
+        if num_speakers is not None:
+            params["num_speakers"] = num_speakers
+        else:
+            params["min_speakers"] = min_speakers
+            params["max_speakers"] = max_speakers
+        
+        duration = await media_downloader.get_duration(audio_path)
+        if duration > DIAR_CHUNK_SECONDS + DIAR_CHUNK_OVERLAP_SECONDS:
+            # A single window may hold only some of the speakers, so an exact
+            # num_speakers is applied as the cap per window and overall
+            turns = await self._diarize_chunked(audio_path, duration, num_speakers or max_speakers)
+        else:
+            loop = asyncio.get_running_loop()
+            diarization, _ = await loop.run_in_executor(
+                self._infer_pool, self._run_pipeline, audio_path, params, False
+            )
+            turns = [
+                (turn.start, turn.end, speaker)
+                for turn, _, speaker in diarization.itertracks(yield_label=True)
+            ]
         
-        def _run_diarization():
-            # Configure pipeline parameters
-            params = {}
-            if num_speakers is not None:
-                params["num_speakers"] = num_speakers
-            else:
-                params["min_speakers"] = min_speakers
-                params["max_speakers"] = max_speakers
-            
-            # Run diarization
-            diarization = self.pipeline(str(audio_path), **params)
-            
-            # Convert to our format
-            segments = []
-            for turn, _, speaker in diarization.itertracks(yield_label=True):
-                segments.append({
-                    "start": turn.start,
-                    "end": turn.end,
-                    "speaker": speaker
-                })
-            
-            return segments
-        
-        loop = asyncio.get_event_loop()
-        segments = await loop.run_in_executor(None, _run_diarization)
-        
-        # Rename speakers to friendly names
+        # Rename speakers to friendly names in order of first appearance
         speaker_map = {}
-        for seg in segments:
-            if seg["speaker"] not in speaker_map:
-                speaker_map[seg["speaker"]] = f"Speaker {len(speaker_map) + 1}"
-            seg["speaker"] = speaker_map[seg["speaker"]]
+        segments = []
+        for start, end, speaker in turns:
+            if speaker not in speaker_map:
+                speaker_map[speaker] = f"Speaker {len(speaker_map) + 1}"
+            segments.append({"start": start, "end": end, "speaker": speaker_map[speaker]})
         
         logger.info(f"Diarization found {len(speaker_map)} speakers, {len(segments)} segments")
         return segments
     
+    def _run_pipeline(self, audio_path: Path, params: dict, return_embeddings: bool):
+        """Blocking pyannote call; returns (annotation, speaker embeddings or None)"""
+        # No autograd bookkeeping needed for inference; fp16 on GPU tensor cores
+        use_fp16 = self._device is not None and self._device.type == "cuda"
+        with torch.inference_mode(), torch.autocast(
+            device_type="cuda" if use_fp16 else "cpu", dtype=torch.float16, enabled=use_fp16
+        ):
+            output = self.pipeline(str(audio_path), return_embeddings=return_embeddings, **params)
+        return output if return_embeddings else (output, None)
+    
+    async def _diarize_chunked(
+        self,
+        audio_path: Path,
+        duration: float,
+        max_speakers: int
+    ) -> list[tuple[float, float, int]]:
+        """
+        Diarize long audio as overlapping windows and stitch speakers together
+        
+        Windows run concurrently on the inference pool. Each window's WAV is
+        cut just before its inference and deleted right after, with at most
+        one window per inference worker (plus one being extracted) on disk.
+        Each window keeps only the turns in its half of the overlaps, and
+        window-local speakers are mapped to global ones by embedding similarity.
+        """
+        step = DIAR_CHUNK_SECONDS - DIAR_CHUNK_OVERLAP_SECONDS
+        offsets = np.arange(0.0, duration - DIAR_CHUNK_OVERLAP_SECONDS, step).tolist()
+        params = {"min_speakers": 1, "max_speakers": max_speakers}
+        loop = asyncio.get_running_loop()
+        in_flight = asyncio.Semaphore(settings.diarization_workers + 1)
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            async def _window(i: int, offset: float):
+                path = Path(tmp) / f"chunk_{i:03d}.wav"
+                async with in_flight:
+                    try:
+                        await self._extract_chunk(audio_path, offset, DIAR_CHUNK_SECONDS, path)
+                        return await loop.run_in_executor(
+                            self._infer_pool, self._run_pipeline, path, params, True
+                        )
+                    finally:
+                        path.unlink(missing_ok=True)
+            
+            results = await asyncio.gather(*(
+                _window(i, offset) for i, offset in enumerate(offsets)
+            ))
+        
+        chunk_labels = [diarization.labels() for diarization, _ in results]
+        global_ids = _match_speakers(
+            chunk_labels, [embeddings for _, embeddings in results], max_speakers
+        )
+        
+        turns = []
+        half_overlap = DIAR_CHUNK_OVERLAP_SECONDS / 2
+        for i, ((diarization, _), offset) in enumerate(zip(results, offsets)):
+            # This window owns the audio up to the middle of each overlap
+            own_start = offset + half_overlap if i > 0 else 0.0
+            own_end = offsets[i + 1] + half_overlap if i + 1 < len(offsets) else float("inf")
+            for turn, _, speaker in diarization.itertracks(yield_label=True):
+                start = max(offset + turn.start, own_start)
+                end = min(offset + turn.end, own_end)
+                if end > start:
+                    turns.append((start, end, global_ids[i][speaker]))
+        
+        turns.sort()
+        logger.info(f"Stitched diarization from {len(offsets)} windows of {audio_path.name}")
+        return turns
+    
+    async def _extract_chunk(self, audio_path: Path, start: float, length: float, output_path: Path) -> None:
+        """Cut a 16 kHz mono WAV window out of the source audio"""
+        async with ffmpeg_slots:
+            proc = await asyncio.create_subprocess_exec(
+                'ffmpeg', '-y', '-nostats', '-loglevel', 'error',
+                '-ss', str(start), '-t', str(length), '-i', str(audio_path),
+                '-ac', '1', '-ar', '16000', str(output_path),
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            _, stderr = await proc.communicate()
+        if proc.returncode != 0:
+            raise RuntimeError(f"ffmpeg chunk extraction failed: {stderr.decode(errors='replace')[-200:]}")
+    
     async def _diarize_fallback(self, audio_path: Path) -> list[dict]:
         """
         Fallback: Use energy-based voice activity detection + clustering
@@ -137,72 +529,90 @@ class SpeakerDiarization:
             # Extract audio features using ffmpeg
             segments = await self._detect_speech_segments(audio_path)
             
-            if not segments or len(segments) == 0:
+            if len(segments) == 0:
                 logger.warning("No speech segments detected, returning empty list")
                 return []
             
             # Simple clustering based on audio characteristics
-            segments = self._cluster_speakers_simple(segments, audio_path)
-            
-            return segments
+            return self._cluster_speakers_simple(segments, audio_path).to_dicts()
         except Exception as e:
             logger.error(f"Fallback diarization failed: {e}")
             return []
     
-    async def _detect_speech_segments(self, audio_path: Path) -> list[dict]:
+    async def _detect_speech_segments(self, audio_path: Path) -> SegmentBatch:
         """Detect speech segments using energy thresholding"""
+        empty = SegmentBatch(np.empty(0), np.empty(0), np.empty(0, dtype=np.int32), [])
+        try:
+            frame_db = await self._frame_levels(audio_path)
+        except Exception as e:
+            logger.warning(f"Speech segment detection failed: {e}")
+            return empty
+        
+        if frame_db.size == 0:
+            return empty
+        
+        # Run-length encode silent frames; only long enough runs split speech
+        silent = frame_db < VAD_SILENCE_DB
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], silent.astype(np.int8), [0]))))
+        run_start, run_end = edges[0::2], edges[1::2]
+        long_run = (run_end - run_start) * VAD_FRAME_SECONDS >= VAD_MIN_SILENCE_SECONDS
+        
+        # Speech is whatever lies between the long silences
+        speech_start = np.concatenate(([0], run_end[long_run])) * VAD_FRAME_SECONDS
+        speech_end = np.concatenate((run_start[long_run], [frame_db.size])) * VAD_FRAME_SECONDS
+        keep = (speech_end - speech_start) > VAD_MIN_SPEECH_SECONDS
+        
+        return SegmentBatch(
+            start=np.round(speech_start[keep], 3),
+            end=np.round(speech_end[keep], 3),
+            speaker_id=np.full(int(keep.sum()), -1, dtype=np.int32),
+            labels=[],
+        )
+    
+    async def _frame_levels(self, audio_path: Path) -> np.ndarray:
+        """Decode audio to mono PCM and return the RMS level (dBFS) of each frame"""
+        frame_samples = int(VAD_SAMPLE_RATE * VAD_FRAME_SECONDS)
+        frame_bytes = frame_samples * 2  # s16le
+        read_size = frame_bytes * 100    # ~10 s of audio per read
+        
+        proc = await asyncio.create_subprocess_exec(
+            'ffmpeg', '-nostats', '-loglevel', 'error', '-i', str(audio_path),
+            '-ac', '1', '-ar', str(VAD_SAMPLE_RATE), '-f', 's16le', '-',
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        
+        levels = []
+        
+        async def _read() -> None:
+            pending = b''
+            while chunk := await proc.stdout.read(read_size):
+                pending += chunk
+                usable = len(pending) - len(pending) % frame_bytes
+                if not usable:
+                    continue
+                samples = np.frombuffer(pending[:usable], dtype='<i2').astype(np.float32) / 32768.0
+                rms = np.sqrt(np.mean(samples.reshape(-1, frame_samples) ** 2, axis=1))
+                levels.append(20 * np.log10(rms + 1e-10))
+                pending = pending[usable:]
         
-        def _analyze():
-            try:
-                cmd = [
-                    'ffmpeg', '-y', '-i', str(audio_path),
-                    '-af', 'silencedetect=noise=-30dB:d=0.5',
-                    '-f', 'null', '-'
-                ]
-                
-                result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
-                stderr = result.stderr
-                
-                # Parse silence detection output
-                segments = []
-                current_start = 0.0
-                
-                for line in stderr.split('\n'):
-                    if 'silence_start' in line:
-                        try:
-                            parts = line.split('silence_start:')
-                            if len(parts) > 1:
-                                end_time = float(parts[1].strip().split()[0])
-                                if end_time > current_start + 0.5:
-                                    segments.append({
-                                        "start": current_start,
-                                        "end": end_time,
-                                        "speaker": "Unknown"
-                                    })
-                        except (ValueError, IndexError):
-                            pass
-                            
-                    elif 'silence_end' in line:
-                        try:
-                            parts = line.split('silence_end:')
-                            if len(parts) > 1:
-                                current_start = float(parts[1].strip().split()[0])
-                        except (ValueError, IndexError):
-                            pass
-                
-                return segments
-            except Exception as e:
-                logger.warning(f"Speech segment detection failed: {e}")
-                return []
-        
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, _analyze)
+        try:
+            await asyncio.wait_for(_read(), timeout=60)
+        except BaseException:
+            # Timed out or cancelled - don't leave ffmpeg running
+            if proc.returncode is None:
+                proc.kill()
+            raise
+        finally:
+            await proc.wait()
+        
+        return np.concatenate(levels) if levels else np.empty(0, dtype=np.float32)
     
     def _cluster_speakers_simple(
         self, 
-        segments: list[dict], 
+        segments: SegmentBatch, 
         audio_path: Path
-    ) -> list[dict]:
+    ) -> SegmentBatch:
         """
         Simple speaker clustering based on segment patterns
         
@@ -212,52 +622,23 @@ class SpeakerDiarization:
         - Alternating patterns suggest conversation
         """
         if len(segments) <= 1:
-            for seg in segments:
-                seg["speaker"] = "Speaker 1"
+            segments.speaker_id = np.zeros(len(segments), dtype=np.int32)
+            segments.labels = ["Speaker 1"]
             return segments
         
         # Analyze gaps between segments
-        gaps = []
-        for i in range(1, len(segments)):
-            gap = segments[i]["start"] - segments[i-1]["end"]
-            gaps.append(gap)
-        
-        if not gaps:
-            for seg in segments:
-                seg["speaker"] = "Speaker 1"
-            return segments
+        gaps = segments.start[1:] - segments.end[:-1]
         
         # Threshold for speaker change (adaptive based on content)
-        median_gap = sorted(gaps)[len(gaps) // 2]
+        k = len(gaps) // 2
+        median_gap = float(np.partition(gaps, k)[k])
         speaker_change_threshold = max(1.5, median_gap * 2)
         
-        # Assign speakers
-        current_speaker = 1
-        max_speakers = 2  # Start with assumption of 2 speakers
-        speaker_history = []
-        
-        for i, seg in enumerate(segments):
-            if i == 0:
-                seg["speaker"] = f"Speaker {current_speaker}"
-                speaker_history.append(current_speaker)
-            else:
-                gap = seg["start"] - segments[i-1]["end"]
-                
-                if gap > speaker_change_threshold:
-                    # Likely speaker change
-                    # Alternate between speakers for conversation pattern
-                    if len(speaker_history) >= 2:
-                        # Look at recent pattern
-                        recent = speaker_history[-3:] if len(speaker_history) >= 3 else speaker_history
-                        if recent[-1] == 1:
-                            current_speaker = 2
-                        else:
-                            current_speaker = 1
-                    else:
-                        current_speaker = 2 if current_speaker == 1 else 1
-                
-                seg["speaker"] = f"Speaker {current_speaker}"
-                speaker_history.append(current_speaker)
+        # Assume a two-person conversation: every long pause hands over to the
+        # other speaker, so the speaker is 1 + (number of changes so far) mod 2
+        changes = np.concatenate(([0], np.cumsum(gaps > speaker_change_threshold)))
+        segments.speaker_id = (changes % 2).astype(np.int32)
+        segments.labels = ["Speaker 1", "Speaker 2"]
         
         return segments
     
@@ -275,31 +656,28 @@ class SpeakerDiarization:
         if not diarization_segments:
             return transcript_segments
         
-        for trans_seg in transcript_segments:
-            trans_start = trans_seg.get("start", 0)
-            trans_end = trans_seg.get("end", trans_start + 1)
-            trans_mid = (trans_start + trans_end) / 2
-            
-            # Find which speaker was active at the midpoint
-            best_speaker = None
-            best_overlap = 0
-            
-            for diar_seg in diarization_segments:
-                diar_start = diar_seg["start"]
-                diar_end = diar_seg["end"]
-                
-                # Calculate overlap
-                overlap_start = max(trans_start, diar_start)
-                overlap_end = min(trans_end, diar_end)
-                overlap = max(0, overlap_end - overlap_start)
-                
-                if overlap > best_overlap:
-                    best_overlap = overlap
-                    best_speaker = diar_seg["speaker"]
-            
-            if best_speaker:
-                trans_seg["speaker"] = best_speaker
-        
+        diar = SegmentBatch.from_dicts(diarization_segments).sorted_by_start()
+        diar_start, diar_end = diar.start, diar.end
+        trans = SegmentBatch.from_dicts(transcript_segments)
+        trans_start, trans_end = trans.start, trans.end
+        
+        # Window of turns that can overlap each segment: everything before `lo`
+        # ended by the segment's start (running max of ends), everything from
+        # `hi` on starts after its end
+        lo = np.searchsorted(np.maximum.accumulate(diar_end), trans_start, side="right")
+        hi = np.searchsorted(diar_start, trans_end, side="left")
+        
+        # Segments without an overlapping turn keep their current speaker
+        assigned = np.full(len(trans), -1, dtype=np.int32)
+        for i in np.flatnonzero(lo < hi).tolist():
+            l, h = lo[i], hi[i]
+            # Pick the speaker with the largest overlap (first one wins ties)
+            overlap = np.minimum(trans_end[i], diar_end[l:h]) - np.maximum(trans_start[i], diar_start[l:h])
+            best = int(overlap.argmax())
+            if overlap[best] > 0:
+                assigned[i] = diar.speaker_id[l + best]
+        
+        SegmentBatch(trans_start, trans_end, assigned, diar.labels).write_speakers(transcript_segments)
         return transcript_segments
     
     def infer_speaker_names(
@@ -323,58 +701,32 @@ class SpeakerDiarization:
             Mapping of generic speaker labels to inferred names
             e.g., {"Speaker 1": "Tony", "Speaker 2": "Zach"}
         """
-        import re
-        
-        # Patterns for self-identification (with capture groups for names)
-        # These are conservative patterns that require explicit name statements
-        identification_patterns = [
-            # "I'm X" / "I am X"
-            (r"\b(?:i'?m|i am)\s+([A-Z][a-z]{2,15})\b", 0.9),
-            # "My name is X"
-            (r"\bmy name is\s+([A-Z][a-z]{2,15})\b", 0.95),
-            # "This is X" (at start of segment, often podcast intros)
-            (r"^(?:hey,?\s+)?this is\s+([A-Z][a-z]{2,15})\b", 0.85),
-            # "X here" (common podcast intro)
-            (r"^([A-Z][a-z]{2,15})\s+here\b", 0.8),
-            # "Call me X"
-            (r"\bcall me\s+([A-Z][a-z]{2,15})\b", 0.85),
-        ]
-        
-        # Patterns for third-party introduction
-        # "Welcome X" / "Thanks X" / "Here's X"
-        introduction_patterns = [
-            (r"\bwelcome(?:,| back)?\s+([A-Z][a-z]{2,15})\b", 0.7),
-            (r"\bthank(?:s| you),?\s+([A-Z][a-z]{2,15})\b", 0.65),
-            (r"\bhere(?:'s| is)\s+([A-Z][a-z]{2,15})\b", 0.7),
-        ]
-        
-        # Names to ignore (common false positives)
-        ignore_names = {
-            'Thanks', 'Thank', 'Hello', 'Welcome', 'Sorry', 'Sure', 'Well',
-            'Okay', 'Right', 'Actually', 'Really', 'Definitely', 'Absolutely',
-            'Yeah', 'Yes', 'No', 'Now', 'So', 'Look', 'See', 'Here', 'There'
-        }
+        # Speakers as interned ids (-1 = none); labels are rendered once at the end
+        batch = SegmentBatch.from_dicts(transcript_segments)
+        speaker_ids = batch.speaker_id.tolist()
         
         # Collect name candidates per speaker
-        speaker_candidates: dict[str, list[tuple[str, float, float]]] = {}  # speaker -> [(name, confidence, time)]
+        speaker_candidates: dict[int, list[tuple[str, float, float]]] = {}  # speaker id -> [(name, confidence, time)]
         
-        for seg in transcript_segments:
-            speaker = seg.get("speaker")
+        for seg_idx, seg in enumerate(transcript_segments):
+            speaker = speaker_ids[seg_idx]
             text = seg.get("text", "")
             start_time = seg.get("start", 0)
             
-            if not speaker or not text:
+            if speaker < 0 or len(text) < _MIN_NAME_TEXT_LEN:
+                continue
+            
+            if not _NAME_TRIGGER_RE.search(text):
                 continue
             
             # Check self-identification patterns
-            for pattern, base_confidence in identification_patterns:
-                matches = re.findall(pattern, text, re.IGNORECASE)
-                for match in matches:
+            for pattern, base_confidence in _IDENTIFICATION_PATTERNS:
+                for match in pattern.findall(text):
                     # Normalize name (capitalize first letter)
                     name = match.strip().capitalize()
                     
                     # Skip ignored names
-                    if name in ignore_names:
+                    if name in _IGNORE_NAMES:
                         continue
                     
                     # Add to candidates
@@ -388,21 +740,18 @@ class SpeakerDiarization:
                     speaker_candidates[speaker].append((name, confidence, start_time))
             
             # Check introduction patterns (name comes from OTHER speaker)
-            for pattern, base_confidence in introduction_patterns:
-                matches = re.findall(pattern, text, re.IGNORECASE)
-                for match in matches:
+            for pattern, base_confidence in _INTRODUCTION_PATTERNS:
+                for match in pattern.findall(text):
                     name = match.strip().capitalize()
                     
-                    if name in ignore_names:
+                    if name in _IGNORE_NAMES:
                         continue
                     
                     # This speaker is introducing someone else
                     # We need to find who they're talking to
                     # Look for the next segment from a different speaker
-                    seg_idx = transcript_segments.index(seg)
-                    for next_seg in transcript_segments[seg_idx + 1:seg_idx + 5]:
-                        next_speaker = next_seg.get("speaker")
-                        if next_speaker and next_speaker != speaker:
+                    for next_speaker in speaker_ids[seg_idx + 1:seg_idx + 5]:
+                        if next_speaker >= 0 and next_speaker != speaker:
                             if next_speaker not in speaker_candidates:
                                 speaker_candidates[next_speaker] = []
                             speaker_candidates[next_speaker].append((name, base_confidence * 0.9, start_time))
@@ -411,7 +760,8 @@ class SpeakerDiarization:
         # Determine final name mapping
         speaker_names: dict[str, str] = {}
         
-        for speaker, candidates in speaker_candidates.items():
+        for speaker_id, candidates in speaker_candidates.items():
+            speaker = batch.labels[speaker_id]
             if not candidates:
                 continue
             
@@ -452,14 +802,68 @@ class SpeakerDiarization:
         Returns:
             Segments with updated speaker names
         """
-        for seg in transcript_segments:
-            speaker = seg.get("speaker")
-            if speaker and speaker in speaker_names:
-                seg["speaker"] = speaker_names[speaker]
+        # Renaming touches each distinct label once, not every segment
+        batch = SegmentBatch.from_dicts(transcript_segments)
+        batch.labels = [speaker_names.get(label, label) for label in batch.labels]
+        batch.write_speakers(transcript_segments)
         
         return transcript_segments
 
 
+def _match_speakers(
+    chunk_labels: list[list[str]],
+    chunk_embeddings: list[np.ndarray],
+    max_speakers: int
+) -> list[dict[str, int]]:
+    """
+    Map each window's local speaker labels to global speaker ids
+    
+    Keeps a running centroid per global speaker. Within a window, local
+    speakers are paired one-to-one with the most similar centroids (cosine,
+    best pairs first); unmatched ones start a new global speaker, or join
+    the nearest one once max_speakers is reached.
+    """
+    centroids: list[np.ndarray] = []
+    mappings = []
+    
+    for labels, embeddings in zip(chunk_labels, chunk_embeddings):
+        mapping: dict[int, int] = {}
+        if len(labels) == 0:
+            mappings.append({})
+            continue
+        
+        # Speakers without a usable embedding come back as NaN rows
+        emb = np.nan_to_num(np.asarray(embeddings, dtype=np.float64)[:len(labels)])
+        emb /= np.maximum(np.linalg.norm(emb, axis=1, keepdims=True), 1e-12)
+        
+        if centroids:
+            known = np.stack(centroids)
+            known /= np.maximum(np.linalg.norm(known, axis=1, keepdims=True), 1e-12)
+            similarity = emb @ known.T
+            taken = set()
+            for flat in np.argsort(similarity, axis=None)[::-1].tolist():
+                local, global_id = divmod(flat, similarity.shape[1])
+                if similarity[local, global_id] < DIAR_SPEAKER_MATCH_SIMILARITY:
+                    break
+                if local in mapping or global_id in taken:
+                    continue
+                mapping[local] = global_id
+                taken.add(global_id)
+        
+        for local in range(len(labels)):
+            if local not in mapping:
+                if len(centroids) < max_speakers:
+                    centroids.append(np.zeros(emb.shape[1]))
+                    mapping[local] = len(centroids) - 1
+                else:
+                    mapping[local] = int(np.argmax(np.stack(centroids) @ emb[local]))
+            centroids[mapping[local]] += emb[local]
+        
+        mappings.append({labels[local]: global_id for local, global_id in mapping.items()})
+    
+    return mappings
+
+
 # Singleton instance
 speaker_diarization = SpeakerDiarization()
 
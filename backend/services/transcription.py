@@ -1,5 +1,5 @@
 """
-Transcription service using OpenAI Whisper (local) with speaker diarization
+Transcription service using Whisper (local, via faster-whisper/CTranslate2) with speaker diarization
 
 Supports:
 - Chunked processing for long-form content (>10 min)
@@ -8,14 +8,20 @@ Supports:
 """
 import asyncio
 import logging
-import subprocess
-import tempfile
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from typing import Optional, Callable, List
-import whisper
+from contextlib import aclosing
+from typing import AsyncIterator, Optional, Callable, List, Union
+import ctranslate2
+import numpy as np
+from faster_whisper import BatchedInferencePipeline, WhisperModel
 
 from config import settings
 from models import TranscriptSegment, TranscriptionResult
+from services.media_downloader import media_downloader
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +30,78 @@ CHUNK_DURATION_SECONDS = 600  # 10 minutes per chunk
 MAX_RETRIES = 3
 RETRY_DELAY_BASE = 2  # Exponential backoff base (seconds)
 LONG_FORM_THRESHOLD = 600  # Files > 10 min trigger chunked processing
+WHISPER_SAMPLE_RATE = 16000  # Whisper's native input rate (mono)
+CHUNK_PREFETCH = 2  # Decoded chunks buffered ahead of the transcriber
+
+# Whisper model of the worker process (set by the pool initializer); wrapped
+# in the batched pipeline when whisper_batch_size > 1
+_WORKER_MODEL = None
+
+
+def _init_whisper_worker(model_name: str) -> None:
+    """Load the Whisper model once when the worker process starts"""
+    global _WORKER_MODEL
+    logging.basicConfig(level=logging.INFO)
+    # CTranslate2 int8 weights; activations stay fp16 on GPU
+    device = "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
+    compute_type = "int8_float16" if device == "cuda" else "int8"
+    logger.info(f"Loading Whisper model in worker: {model_name} ({device}, {compute_type})")
+    _WORKER_MODEL = WhisperModel(
+        model_name,
+        device=device,
+        compute_type=compute_type,
+        download_root=str(settings.hf_cache_dir) if settings.hf_cache_dir else None,
+    )
+    if settings.whisper_batch_size > 1:
+        # Splits audio into VAD-bounded windows and decodes them in batches
+        _WORKER_MODEL = BatchedInferencePipeline(model=_WORKER_MODEL)
+    logger.info("Whisper model loaded successfully")
+
+
+def _whisper_transcribe(audio: Union[str, bytes], options: dict) -> dict:
+    """
+    Transcribe a file path or raw 16 kHz mono s16le PCM with the worker's model
+    
+    Returns the openai-whisper result shape the service consumes:
+    {"text", "language", "segments": [{"start", "end", "text", "avg_logprob"}]}
+    """
+    if isinstance(audio, bytes):
+        # PCM crosses the process boundary as int16 (half the bytes of float32)
+        audio = np.frombuffer(audio, dtype=np.int16).astype(np.float32) / 32768.0
+    
+    if isinstance(_WORKER_MODEL, BatchedInferencePipeline):
+        options = {**options, 'batch_size': settings.whisper_batch_size}
+    segments, info = _WORKER_MODEL.transcribe(audio, **options)
+    segments = [
+        {"start": seg.start, "end": seg.end, "text": seg.text, "avg_logprob": seg.avg_logprob}
+        for seg in segments  # Lazy generator - decoding happens here
+    ]
+    return {
+        "text": "".join(seg["text"] for seg in segments),
+        "language": info.language,
+        "segments": segments,
+    }
+
+
+def _worker_ready() -> bool:
+    """No-op task whose only effect is running the pool initializer"""
+    return _WORKER_MODEL is not None
+
+
+def _is_out_of_memory(error: Exception) -> bool:
+    """CTranslate2 reports CUDA/host allocation failures as RuntimeError"""
+    if isinstance(error, MemoryError):
+        return True
+    return isinstance(error, RuntimeError) and "out of memory" in str(error).lower()
+
+
+def _is_transient(error: Exception) -> bool:
+    """Whether a transcription error is worth retrying"""
+    if isinstance(error, (FileNotFoundError, PermissionError, IsADirectoryError)):
+        return False
+    if isinstance(error, (BrokenProcessPool, OSError, TimeoutError)):
+        return True
+    return _is_out_of_memory(error)
 
 
 class TranscriptionService:
@@ -37,20 +115,58 @@ class TranscriptionService:
     """
     
     def __init__(self):
-        self._model = None
+        self._executor: Optional[ProcessPoolExecutor] = None
         self._model_name = settings.whisper_model
         self._diarization = None
         # Progress callback for real-time updates
         self._progress_callback: Optional[Callable[[float, str], None]] = None
     
     @property
-    def model(self):
-        """Lazy load the Whisper model"""
-        if self._model is None:
-            logger.info(f"Loading Whisper model: {self._model_name}")
-            self._model = whisper.load_model(self._model_name)
-            logger.info("Whisper model loaded successfully")
-        return self._model
+    def executor(self) -> ProcessPoolExecutor:
+        """
+        Lazily start the single Whisper worker process
+        
+        The model lives in its own process, so inference never holds this
+        process's GIL and the model is loaded once per worker lifetime.
+        """
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=1,
+                # spawn: forking a process with running threads (event loop,
+                # DB pool) can deadlock the child
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_whisper_worker,
+                initargs=(self._model_name,),
+            )
+        return self._executor
+    
+    async def warm_up(self) -> None:
+        """
+        Start the Whisper worker and load the model ahead of the first request.
+        
+        Transcriptions submitted meanwhile queue behind the load in the same
+        single-worker pool instead of starting a second copy.
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, _worker_ready)
+    
+    def _recycle_executor(self, failed: ProcessPoolExecutor) -> None:
+        """
+        Replace a failed Whisper pool without cancelling work queued on it
+        
+        Other requests' transcriptions already submitted to the old pool
+        still finish there; the old worker exits once they're done. Only
+        the first caller to report a given pool replaces it.
+        """
+        if self._executor is failed:
+            self._executor = None
+            failed.shutdown(wait=False)
+    
+    def shutdown(self) -> None:
+        """Stop the Whisper worker process"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
     
     @property
     def diarization(self):
@@ -78,57 +194,85 @@ class TranscriptionService:
                 logger.warning(f"Progress callback error: {e}")
     
     async def _get_audio_duration(self, file_path: Path) -> float:
-        """Get audio/video duration using ffprobe"""
-        def _probe():
-            try:
-                cmd = [
-                    'ffprobe', '-v', 'error',
-                    '-show_entries', 'format=duration',
-                    '-of', 'default=noprint_wrappers=1:nokey=1',
-                    str(file_path)
-                ]
-                result = subprocess.run(cmd, capture_output=True, text=True)
-                return float(result.stdout.strip())
-            except Exception as e:
-                logger.warning(f"Could not get duration: {e}")
-                return 0.0
-        
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, _probe)
+        """Get audio/video duration (ffprobe, shared per-file cache with ingest)"""
+        return await media_downloader.get_duration(file_path)
     
-    async def _extract_audio_chunk(
-        self, 
-        file_path: Path, 
-        start: float, 
-        duration: float,
-        output_path: Path
-    ) -> bool:
-        """Extract a chunk of audio using ffmpeg"""
-        def _extract():
-            try:
-                cmd = [
-                    'ffmpeg', '-y',
-                    '-ss', str(start),
-                    '-i', str(file_path),
-                    '-t', str(duration),
-                    '-vn',  # No video
-                    '-acodec', 'pcm_s16le',  # WAV format for Whisper
-                    '-ar', '16000',  # 16kHz sample rate
-                    '-ac', '1',  # Mono
-                    str(output_path)
-                ]
-                result = subprocess.run(cmd, capture_output=True, text=True)
-                return result.returncode == 0
-            except Exception as e:
-                logger.error(f"Chunk extraction error: {e}")
-                return False
+    async def _iter_pcm_chunks(self, file_path: Path) -> AsyncIterator[tuple[bytes, float, float]]:
+        """
+        Decode the audio once and yield it as CHUNK_DURATION_SECONDS slices of PCM
+        
+        ffmpeg streams 16 kHz mono s16le to stdout, so no chunk ever touches
+        disk. A reader task keeps up to CHUNK_PREFETCH chunks decoded ahead
+        while the caller transcribes the current one.
         
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, _extract)
+        Yields:
+            (pcm_bytes, start, end) in order, times in seconds of the source
+            
+        Raises:
+            RuntimeError: If ffmpeg exits non-zero (after the chunks it did decode)
+        """
+        cmd = [
+            'ffmpeg', '-nostats', '-loglevel', 'error',
+            '-i', str(file_path),
+            '-vn',  # No video
+            '-f', 's16le',
+            '-acodec', 'pcm_s16le',
+            '-ar', str(WHISPER_SAMPLE_RATE),
+            '-ac', '1',  # Mono
+            '-'
+        ]
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        # Drain stderr alongside so ffmpeg can never block on a full pipe
+        stderr_task = asyncio.create_task(proc.stderr.read())
+        
+        bytes_per_second = WHISPER_SAMPLE_RATE * 2
+        chunk_bytes = CHUNK_DURATION_SECONDS * bytes_per_second
+        queue: asyncio.Queue[Optional[bytes]] = asyncio.Queue(maxsize=CHUNK_PREFETCH)
+        
+        async def _read() -> None:
+            try:
+                while True:
+                    try:
+                        pcm = await proc.stdout.readexactly(chunk_bytes)
+                    except asyncio.IncompleteReadError as e:
+                        pcm = e.partial  # Final, shorter chunk
+                    if not pcm:
+                        break
+                    await queue.put(pcm)
+                    if len(pcm) < chunk_bytes:
+                        break
+            finally:
+                await queue.put(None)
+        
+        reader = asyncio.create_task(_read())
+        try:
+            start = 0.0
+            while (pcm := await queue.get()) is not None:
+                end = start + len(pcm) / bytes_per_second
+                yield pcm, start, end
+                start = end
+            
+            await reader  # Surface read errors
+            await proc.wait()
+            if proc.returncode != 0:
+                # A failed decode must not pass for a short (or empty) transcript
+                stderr = await stderr_task
+                raise RuntimeError(f"Audio decoding failed: {stderr.decode(errors='replace')[-500:]}")
+        finally:
+            # Consumer stopped early or was cancelled - don't leave ffmpeg running
+            reader.cancel()
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+            stderr_task.cancel()
     
     async def _transcribe_with_retry(
         self,
-        file_path: Path,
+        audio: Union[Path, bytes],
         language: Optional[str] = None,
         max_retries: int = MAX_RETRIES
     ) -> dict:
@@ -136,7 +280,7 @@ class TranscriptionService:
         Transcribe with retry logic and exponential backoff.
         
         Args:
-            file_path: Path to audio file
+            audio: Path to audio file, or raw 16 kHz mono s16le PCM
             language: Optional language code
             max_retries: Maximum retry attempts
             
@@ -144,28 +288,41 @@ class TranscriptionService:
             Whisper transcription result dict
             
         Raises:
-            RuntimeError: If all retries fail
+            RuntimeError: On a non-transient error, or if all retries fail
         """
         last_error = None
         
         for attempt in range(max_retries):
             try:
-                def _transcribe():
-                    options = {
-                        'task': 'transcribe',
-                        'verbose': False,
-                        'word_timestamps': True,
-                    }
-                    if language:
-                        options['language'] = language
-                    return self.model.transcribe(str(file_path), **options)
+                options = {
+                    'task': 'transcribe',
+                    'word_timestamps': True,
+                    # Skip silence before decoding instead of letting Whisper chew on it
+                    'vad_filter': True,
+                }
+                if language:
+                    options['language'] = language
                 
-                loop = asyncio.get_event_loop()
-                result = await loop.run_in_executor(None, _transcribe)
+                loop = asyncio.get_running_loop()
+                executor = self.executor
+                result = await loop.run_in_executor(
+                    executor,
+                    _whisper_transcribe,
+                    audio if isinstance(audio, bytes) else str(audio),
+                    options,
+                )
                 return result
                 
             except Exception as e:
                 last_error = e
+                if not _is_transient(e):
+                    # Corrupt input, unsupported codec, bad options: retrying won't help
+                    logger.error(f"Transcription failed: {e}")
+                    raise RuntimeError(f"Transcription failed: {e}") from e
+                if isinstance(e, BrokenProcessPool) or _is_out_of_memory(e):
+                    # Worker died or its allocator is exhausted; the next attempt
+                    # starts a fresh one
+                    self._recycle_executor(executor)
                 if attempt < max_retries - 1:
                     delay = RETRY_DELAY_BASE ** (attempt + 1)
                     logger.warning(
@@ -183,7 +340,8 @@ class TranscriptionService:
         media_id: str,
         file_path: Path,
         language: Optional[str] = None,
-        force_chunked: bool = False
+        force_chunked: bool = False,
+        duration: Optional[float] = None
     ) -> TranscriptionResult:
         """
         Transcribe audio/video file with automatic chunking for long content.
@@ -193,6 +351,7 @@ class TranscriptionService:
             file_path: Path to the media file
             language: Optional language code (auto-detect if None)
             force_chunked: Force chunked processing even for short files
+            duration: Media duration in seconds if already known (skips probing)
         
         Returns:
             TranscriptionResult with segments and full text
@@ -201,12 +360,13 @@ class TranscriptionService:
         self._report_progress(0.0, "Analyzing audio file...")
         
         # Get duration to decide processing strategy
-        duration = await self._get_audio_duration(file_path)
+        if not duration:
+            duration = await self._get_audio_duration(file_path)
         logger.info(f"Media duration: {duration:.1f}s")
         
         # Use chunked processing for long-form content
         if duration > LONG_FORM_THRESHOLD or force_chunked:
-            num_chunks = int(duration / CHUNK_DURATION_SECONDS) + 1
+            num_chunks = max(1, math.ceil(duration / CHUNK_DURATION_SECONDS))
             logger.info(f"Using chunked processing for long-form content ({duration:.1f}s, {num_chunks} chunks)")
             # Format duration for display
             hours = int(duration // 3600)
@@ -226,15 +386,7 @@ class TranscriptionService:
         self._report_progress(0.9, "Processing segments...")
         
         # Convert to our segment format
-        segments = []
-        for i, seg in enumerate(result['segments']):
-            segments.append(TranscriptSegment(
-                id=i,
-                start=seg['start'],
-                end=seg['end'],
-                text=seg['text'].strip(),
-                confidence=seg.get('avg_logprob', 0) if seg.get('avg_logprob') else 1.0,
-            ))
+        segments = self._to_segments(result['segments'])
         
         full_text = result['text'].strip()
         detected_language = result.get('language', 'en')
@@ -274,23 +426,22 @@ class TranscriptionService:
         Returns:
             TranscriptionResult with merged segments
         """
-        # Calculate chunks
-        num_chunks = int(duration / CHUNK_DURATION_SECONDS) + 1
         all_segments: List[TranscriptSegment] = []
         full_text_parts: List[str] = []
         detected_language = 'en'
         
+        # Decode the source once and hand Whisper in-memory PCM slices, instead of
+        # one seek + decode + temp WAV per chunk; decoding runs ahead of Whisper
+        num_chunks = max(1, math.ceil(duration / CHUNK_DURATION_SECONDS))
         logger.info(f"Processing {num_chunks} chunks for {duration:.1f}s audio")
         
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_path = Path(temp_dir)
-            
-            for chunk_idx in range(num_chunks):
-                chunk_start = chunk_idx * CHUNK_DURATION_SECONDS
-                chunk_duration = min(CHUNK_DURATION_SECONDS, duration - chunk_start)
-                
-                if chunk_duration <= 0:
-                    break
+        chunk_idx = -1
+        async with aclosing(self._iter_pcm_chunks(file_path)) as chunks:
+            async for chunk_pcm, chunk_start, chunk_end in chunks:
+                chunk_idx += 1
+                # The estimate can be one short when the audio barely spills over
+                num_chunks = max(num_chunks, chunk_idx + 1)
+                chunk_duration = chunk_end - chunk_start
                 
                 # Progress calculation with percentage
                 chunk_progress = chunk_idx / num_chunks
@@ -316,34 +467,18 @@ class TranscriptionService:
                     f"Time range: {start_str} to {end_str}"
                 )
                 
-                # Extract chunk
-                chunk_file = temp_path / f"chunk_{chunk_idx}.wav"
-                success = await self._extract_audio_chunk(
-                    file_path, chunk_start, chunk_duration, chunk_file
-                )
-                
-                if not success:
-                    logger.error(f"Failed to extract chunk {chunk_idx}")
-                    continue
-                
                 try:
                     # Transcribe chunk with retry logic
-                    result = await self._transcribe_with_retry(chunk_file, language)
+                    result = await self._transcribe_with_retry(chunk_pcm, language)
                     
                     # Update detected language from first chunk
                     if chunk_idx == 0:
                         detected_language = result.get('language', 'en')
                     
                     # Merge segments with time offset
-                    segment_offset = len(all_segments)
-                    for i, seg in enumerate(result['segments']):
-                        all_segments.append(TranscriptSegment(
-                            id=segment_offset + i,
-                            start=seg['start'] + chunk_start,  # Add time offset
-                            end=seg['end'] + chunk_start,
-                            text=seg['text'].strip(),
-                            confidence=seg.get('avg_logprob', 0) if seg.get('avg_logprob') else 1.0,
-                        ))
+                    all_segments.extend(self._to_segments(
+                        result['segments'], offset=chunk_start, first_id=len(all_segments)
+                    ))
                     
                     full_text_parts.append(result['text'].strip())
                     
@@ -355,10 +490,6 @@ class TranscriptionService:
                 except Exception as e:
                     logger.error(f"Failed to transcribe chunk {chunk_idx}: {e}")
                     # Continue with remaining chunks
-                finally:
-                    # Clean up chunk file
-                    if chunk_file.exists():
-                        chunk_file.unlink()
         
         self._report_progress(0.95, "Merging transcription segments...")
         
@@ -381,6 +512,32 @@ class TranscriptionService:
             full_text=full_text,
         )
     
+    def _to_segments(
+        self,
+        raw_segments: list[dict],
+        offset: float = 0.0,
+        first_id: int = 0
+    ) -> List[TranscriptSegment]:
+        """
+        Build TranscriptSegments from Whisper's segment dicts
+        
+        Whisper output is already typed, so segments are built with
+        model_construct() and skip Pydantic validation.
+        """
+        construct = TranscriptSegment.model_construct
+        return [
+            construct(
+                id=first_id + i,
+                start=seg['start'] + offset,
+                end=seg['end'] + offset,
+                text=seg['text'].strip(),
+                speaker=None,
+                # A log-prob of exactly 0.0 is a real (perfect) score, not missing
+                confidence=1.0 if (logprob := seg.get('avg_logprob')) is None else logprob,
+            )
+            for i, seg in enumerate(raw_segments)
+        ]
+    
     def _merge_overlapping_segments(
         self, 
         segments: List[TranscriptSegment]
@@ -397,8 +554,11 @@ class TranscriptionService:
         if not segments:
             return []
         
-        # Sort by start time
-        sorted_segs = sorted(segments, key=lambda s: s.start)
+        # Chunks are appended in time order, so this is normally already
+        # sorted; only fall back to sorting if Whisper emitted a step back
+        sorted_segs = segments
+        if any(b.start < a.start for a, b in zip(segments, segments[1:])):
+            sorted_segs = sorted(segments, key=lambda s: s.start)
         merged = [sorted_segs[0]]
         
         for seg in sorted_segs[1:]:
@@ -408,7 +568,8 @@ class TranscriptionService:
             if seg.start <= last.end + 0.5:
                 # Segments overlap - merge if text is similar
                 # Otherwise keep both (different speakers might overlap)
-                if seg.text.strip() == last.text.strip():
+                # Text is stripped when segments are built
+                if seg.text == last.text:
                     # Duplicate - extend end time and skip
                     last.end = max(last.end, seg.end)
                 else:
@@ -428,7 +589,8 @@ class TranscriptionService:
         media_id: str,
         file_path: Path,
         language: Optional[str] = None,
-        num_speakers: Optional[int] = None
+        num_speakers: Optional[int] = None,
+        duration: Optional[float] = None
     ) -> TranscriptionResult:
         """
         Transcribe with speaker diarization
@@ -441,72 +603,41 @@ class TranscriptionService:
             file_path: Path to the media file
             language: Optional language code
             num_speakers: Exact number of speakers if known
+            duration: Media duration in seconds if already known (skips probing)
         
         Returns:
             TranscriptionResult with speaker labels
         """
-        # Run transcription first (more reliable)
         logger.info(f"Starting transcription with speaker diarization for {media_id}")
         
-        transcription_result = await self.transcribe(media_id, file_path, language)
+        # Diarization only needs the audio, so it runs alongside transcription.
+        # It may fail on some files; that falls back to heuristic speakers.
+        async def _diarize() -> list[dict]:
+            try:
+                return await self.diarization.diarize(
+                    file_path,
+                    num_speakers=num_speakers,
+                    min_speakers=1,
+                    max_speakers=10
+                )
+            except Exception as e:
+                logger.warning(f"Diarization failed: {e}")
+                return []
         
-        # Try diarization separately - it may fail on some files
-        diarization_segments = []
+        diarization_task = asyncio.create_task(_diarize())
         try:
-            diarization_segments = await self.diarization.diarize(
-                file_path,
-                num_speakers=num_speakers,
-                min_speakers=1,
-                max_speakers=10
+            transcription_result = await self.transcribe(
+                media_id, file_path, language, duration=duration
             )
-        except Exception as e:
-            logger.warning(f"Diarization failed: {e}")
-            diarization_segments = []
+        except BaseException:
+            # No transcript to label - don't leave diarization running
+            diarization_task.cancel()
+            raise
         
-        # Merge diarization with transcription if we got results
-        if diarization_segments and len(diarization_segments) > 0:
-            # Convert segments to dicts for merging
-            segment_dicts = [
-                {
-                    "id": seg.id,
-                    "start": seg.start,
-                    "end": seg.end,
-                    "text": seg.text,
-                    "confidence": seg.confidence,
-                    "speaker": seg.speaker
-                }
-                for seg in transcription_result.segments
-            ]
-            
-            # Merge speaker labels
-            merged = self.diarization.merge_with_transcript(
-                segment_dicts,
-                diarization_segments
-            )
-            
-            # Convert back to TranscriptSegment objects
-            transcription_result.segments = [
-                TranscriptSegment(
-                    id=seg["id"],
-                    start=seg["start"],
-                    end=seg["end"],
-                    text=seg["text"],
-                    speaker=seg.get("speaker"),
-                    confidence=seg["confidence"]
-                )
-                for seg in merged
-            ]
-            
-            # Count unique speakers
-            speakers = set(seg.speaker for seg in transcription_result.segments if seg.speaker)
-            logger.info(f"Diarization identified {len(speakers)} speakers")
-        else:
-            # Fallback to simple heuristic if diarization failed
-            logger.warning("Diarization failed, using fallback speaker detection")
-            await self._apply_fallback_speakers(transcription_result)
+        diarization_segments = await diarization_task
         
-        # Task 2.5.6: Infer speaker names from content
-        # Convert to dict format for name inference
+        # One dict view of the segments serves merging, name inference and
+        # renaming; speakers are copied back onto the segments once at the end
         segment_dicts = [
             {
                 "id": seg.id,
@@ -519,7 +650,22 @@ class TranscriptionService:
             for seg in transcription_result.segments
         ]
         
-        # Try to infer speaker names
+        # Merge diarization with transcription if we got results
+        if diarization_segments:
+            # Merge speaker labels
+            self.diarization.merge_with_transcript(segment_dicts, diarization_segments)
+            
+            # Count unique speakers
+            speakers = set(seg["speaker"] for seg in segment_dicts if seg["speaker"])
+            logger.info(f"Diarization identified {len(speakers)} speakers")
+        else:
+            # Fallback to simple heuristic if diarization failed
+            logger.warning("Diarization failed, using fallback speaker detection")
+            await self._apply_fallback_speakers(transcription_result)
+            for seg_dict, seg in zip(segment_dicts, transcription_result.segments):
+                seg_dict["speaker"] = seg.speaker
+        
+        # Task 2.5.6: Infer speaker names from content
         try:
             speaker_names = self.diarization.infer_speaker_names(segment_dicts)
             
@@ -528,14 +674,13 @@ class TranscriptionService:
                 
                 # Apply the names
                 self.diarization.apply_speaker_names(segment_dicts, speaker_names)
-                
-                # Update the segments with new speaker names
-                for seg, seg_dict in zip(transcription_result.segments, segment_dicts):
-                    seg.speaker = seg_dict.get("speaker")
         except Exception as e:
             logger.warning(f"Speaker name inference failed: {e}")
             # Continue without inferred names - generic labels are fine
         
+        for seg, seg_dict in zip(transcription_result.segments, segment_dicts):
+            seg.speaker = seg_dict.get("speaker")
+        
         return transcription_result
     
     async def _apply_fallback_speakers(self, result: TranscriptionResult):
@@ -543,7 +688,8 @@ class TranscriptionService:
         if not result.segments:
             return
         
-        current_speaker = 1
+        labels = ("Speaker 1", "Speaker 2")
+        current_speaker = 0  # Index into labels
         prev_end = 0
         
         for segment in result.segments:
@@ -551,14 +697,11 @@ class TranscriptionService:
             
             # Speaker likely changed if:
             # - Long pause (> 1.5s)
-            # - Very short segment followed by longer one (interruption pattern)
-            if gap > 1.5:
-                current_speaker = 2 if current_speaker == 1 else 1
-            elif gap > 0.8 and len(segment.text) > 50:
-                # Might be a new speaker taking over
-                current_speaker = 2 if current_speaker == 1 else 1
+            # - Shorter pause before a long segment (new speaker taking over)
+            if gap > 1.5 or (gap > 0.8 and len(segment.text) > 50):
+                current_speaker ^= 1
             
-            segment.speaker = f"Speaker {current_speaker}"
+            segment.speaker = labels[current_speaker]
             prev_end = segment.end
 
 